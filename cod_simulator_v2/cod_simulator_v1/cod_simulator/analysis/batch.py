@@ -0,0 +1,151 @@
+from __future__ import annotations
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
+from ..engine.stats import StatBlock, resolve_build_stats
+from ..engine.effects import compile_skill_effects
+from ..engine.simulation import CombatSimulator
+
+"""
+Batch planner: simulate each distinct scenario once.
+
+Different talent picks, artifacts, pets or extra bonuses often resolve to the
+same final stats. A scenario's canonical key is what the simulator actually
+depends on: the attacker's rotation (rage cost, skill factor, compiled
+effects), both final stat blocks and the SimConfig. Scenarios sharing a key are
+simulated once and the result is copied back to every scenario id.
+
+Monte Carlo configs (deterministic=False) are never merged: each scenario
+stands for its own independent sample.
+
+Jobs run serially, in a process pool, or in a thread pool. Threads share the
+read-only catalogs and stats; every simulator owns its state and its RNG, so
+they only scale with cores on free-threaded CPython. mode="auto" picks threads
+there and processes on GIL builds.
+"""
+
+# Final stats are compared at this many decimals so summation order of bonuses doesn't split groups.
+STAT_DECIMALS = 9
+
+@dataclass(frozen=True)
+class Scenario:
+    id: str
+    attacker_build: Build
+    defender_build: Build
+    config: SimConfig
+
+@dataclass
+class BatchPlan:
+    # One entry per simulation to run: (attacker hero, attacker stats, defender stats, config)
+    jobs: List[Tuple[Hero, StatBlock, StatBlock, SimConfig]] = field(default_factory=list)
+    # Scenario ids served by each job, same order as jobs
+    members: List[List[str]] = field(default_factory=list)
+
+    @property
+    def scenarios(self) -> int:
+        return sum(len(m) for m in self.members)
+
+def _stats_key(stats: StatBlock) -> Tuple[Tuple[str, float], ...]:
+    return tuple(sorted((k, round(v, STAT_DECIMALS)) for k, v in stats.as_dict().items()))
+
+def scenario_key(hero: Hero, attacker: StatBlock, defender: StatBlock, config: SimConfig) -> Hashable:
+    effects = hero.compiled_effects or compile_skill_effects(hero.id, hero.skill_effects)
+    return (hero.rage_cost, float(hero.skill_factor), effects, _stats_key(attacker), _stats_key(defender), config)
+
+def plan_batch(
+    scenarios: List[Scenario],
+    *,
+    heroes: Dict[str, Hero],
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+) -> BatchPlan:
+    plan = BatchPlan()
+    index: Dict[Hashable, int] = {}
+    res = dict(artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    for sc in scenarios:
+        hero = heroes[sc.attacker_build.hero_id]
+        att = resolve_build_stats(hero, sc.attacker_build, **res)
+        dfn = resolve_build_stats(heroes[sc.defender_build.hero_id], sc.defender_build, **res)
+        key: Optional[Hashable] = scenario_key(hero, att, dfn, sc.config) if sc.config.deterministic else None
+        i = index.get(key) if key is not None else None
+        if i is None:
+            i = len(plan.jobs)
+            plan.jobs.append((hero, att, dfn, sc.config))
+            plan.members.append([])
+            if key is not None:
+                index[key] = i
+        plan.members[i].append(sc.id)
+    return plan
+
+def matchup_scenarios(heroes: Dict[str, Hero], builds: Dict[str, Build], configs: List[SimConfig]) -> List[Scenario]:
+    """Every hero against every other hero under each config; ids are "attacker|defender|config index"."""
+    out: List[Scenario] = []
+    for c, cfg in enumerate(configs):
+        for a in heroes:
+            for b in heroes:
+                if a != b:
+                    out.append(Scenario(id=f"{a}|{b}|{c}", attacker_build=builds.get(a) or Build(hero_id=a),
+                                        defender_build=builds.get(b) or Build(hero_id=b), config=cfg))
+    return out
+
+def gil_enabled() -> bool:
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+def _run_job(job: Tuple[Hero, StatBlock, StatBlock, SimConfig], seed: Optional[int] = None) -> Dict[str, Any]:
+    hero, att, dfn, cfg = job
+    rng = random.Random(seed) if seed is not None else None
+    return CombatSimulator.from_stats(attacker_hero=hero, attacker_stats=att, defender_stats=dfn, config=cfg, rng=rng).run()
+
+def _run_slice(jobs: List[Tuple[Hero, StatBlock, StatBlock, SimConfig]], seeds: List[Optional[int]]) -> List[Dict[str, Any]]:
+    return [_run_job(j, s) for j, s in zip(jobs, seeds)]
+
+def run_plan(plan: BatchPlan, *, workers: int = 1, mode: str = "auto", seed: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """Results keyed by scenario id (each id gets its own copy).
+
+    mode: "auto" | "serial" | "thread" | "process". With `seed`, job i rolls crits
+    from its own Random seeded from (seed, i) so results don't depend on scheduling; without it every
+    simulator draws from its own unseeded Random.
+    """
+    n = len(plan.jobs)
+    if mode == "auto":
+        mode = "serial" if workers <= 1 or n <= 1 else ("process" if gil_enabled() else "thread")
+    seeds: List[Optional[int]] = [seed * 1_000_003 + i for i in range(n)] if seed is not None else [None] * n
+
+    if mode == "serial":
+        results = _run_slice(plan.jobs, seeds)
+    elif mode in ("thread", "process"):
+        # Contiguous slices, a few per worker, keep per-task overhead low
+        step = max(1, -(-n // (max(1, workers) * 4)))
+        bounds = [(i, min(i + step, n)) for i in range(0, n, step)]
+        pool_cls = ThreadPoolExecutor if mode == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=max(1, workers)) as pool:
+            parts = pool.map(_run_slice, [plan.jobs[a:b] for a, b in bounds], [seeds[a:b] for a, b in bounds])
+            results = [r for part in parts for r in part]
+    else:
+        raise ValueError(f"unknown mode {mode!r}")
+    out: Dict[str, Dict[str, Any]] = {}
+    for result, ids in zip(results, plan.members):
+        for sid in ids:
+            out[sid] = {**result, "breakdown": dict(result["breakdown"]), "support": dict(result["support"])}
+    return out
+
+def run_batch(
+    scenarios: List[Scenario],
+    *,
+    heroes: Dict[str, Hero],
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+    workers: Optional[int] = None,
+    mode: str = "auto",
+    seed: Optional[int] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """Simulate a batch with duplicates removed; returns (results by id, {"scenarios", "simulated"})."""
+    plan = plan_batch(scenarios, heroes=heroes, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    results = run_plan(plan, workers=workers if workers is not None else (os.cpu_count() or 1), mode=mode, seed=seed)
+    return results, {"scenarios": plan.scenarios, "simulated": len(plan.jobs)}
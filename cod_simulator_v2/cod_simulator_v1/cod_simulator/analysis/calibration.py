@@ -0,0 +1,299 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
+from ..io.json_loader import _load_json, parse_build
+from .batch import Scenario, plan_batch, run_plan
+
+"""
+Fit SimConfig constants to observed battle reports.
+
+Each observation is a fight (both builds, duration, targets) with the damage
+the game reported. Observations are planned once as a batch (final stats
+resolved, identical fights merged); a candidate parameter set then only swaps
+the SimConfig into every job and re-runs the plan through run_plan
+(deterministic, so long fights are cheap via cycle extrapolation).
+
+The loss is the sum of weighted squared log errors, log(simulated / observed).
+Search: a Latin hypercube over the bounds, then Nelder-Mead from the best
+points in the unit box.
+
+Uncertainty: smooth parameters get the Gauss-Newton covariance s^2 (J^T J)^-1
+at the optimum, J by central differences. Parameters that only move whole
+casts (rage constants) leave the loss piecewise constant, so a derivative says
+nothing; they are flagged `piecewise` and get instead the plateau (range
+around the fit that gives exactly the same damage) and a 95% slice interval,
+the values whose loss stays under s_min * (1 + 3.84 / dof) with the other
+parameters held at the fit.
+"""
+
+FIT_PARAMS: Dict[str, Tuple[float, float]] = {
+    "defense_constant": (100.0, 5000.0),
+    "rage_on_normal": (10.0, 400.0),
+    "rage_on_counter": (0.0, 150.0),
+    "aoe_split_ratio": (0.0, 1.0),
+}
+# With attacks and counters on the same cadence only their rage sum is observable,
+# so rage_on_counter stays at the base config unless asked for.
+DEFAULT_FIT = ("defense_constant", "rage_on_normal", "aoe_split_ratio")
+
+@dataclass(frozen=True)
+class Observation:
+    attacker_build: Build
+    defender_build: Build
+    duration_s: int
+    damage: float
+    target_count: int = 1
+    weight: float = 1.0
+
+def load_observations(path: str | Path) -> List[Observation]:
+    """{"observations": [{"attacker": {build}, "defender": {build}, "duration_s": 60, "damage": 123456, "target_count": 1, "weight": 1}]}"""
+    out: List[Observation] = []
+    for i, o in enumerate(_load_json(path).get("observations", [])):
+        damage = float(o.get("damage", 0.0))
+        if damage <= 0:
+            raise ValueError(f"{path}: observations[{i}] needs damage > 0")
+        out.append(Observation(
+            attacker_build=parse_build(o.get("attacker", {}) or {}),
+            defender_build=parse_build(o.get("defender", {}) or {}),
+            duration_s=int(o.get("duration_s", 60)),
+            damage=damage,
+            target_count=int(o.get("target_count", 1)),
+            weight=float(o.get("weight", 1.0)),
+        ))
+    return out
+
+# Chi-square(1) 95% quantile, for slice intervals of piecewise-constant parameters
+CHI2_95 = 3.841
+
+@dataclass
+class CalibrationResult:
+    params: Dict[str, float]
+    std: Dict[str, Optional[float]]        # None for piecewise parameters (see intervals)
+    rmse_log: float          # weighted RMS of log(sim / observed)
+    evaluations: int
+    residuals: List[float]
+    piecewise: List[str] = field(default_factory=list)
+    plateaus: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    intervals: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # 95% slice intervals of piecewise parameters
+
+    def summary(self) -> Dict[str, Any]:
+        ci = {k: None if s is None else [self.params[k] - 1.96 * s, self.params[k] + 1.96 * s] for k, s in self.std.items()}
+        ci.update({k: list(v) for k, v in self.intervals.items()})
+        return {
+            "params": self.params,
+            "std": self.std,
+            "ci95": ci,
+            "piecewise": self.piecewise,
+            "plateaus": {k: list(v) for k, v in self.plateaus.items()},
+            "rmse_log": self.rmse_log,
+            "mean_abs_pct_error": float(np.mean(np.abs(np.expm1(self.residuals)))) * 100.0 if self.residuals else 0.0,
+            "evaluations": self.evaluations,
+        }
+
+class Calibrator:
+    def __init__(
+        self,
+        observations: Sequence[Observation],
+        *,
+        heroes: Dict[str, Hero],
+        artifacts: Dict[str, Artifact],
+        pets: Dict[str, Pet],
+        talent_nodes: Dict[str, TalentNode],
+        base_config: SimConfig = SimConfig(),
+        fit: Sequence[str] = DEFAULT_FIT,
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        workers: int = 1,
+    ) -> None:
+        if not observations:
+            raise ValueError("no observations to calibrate against")
+        unknown = [k for k in fit if k not in FIT_PARAMS]
+        if unknown:
+            raise ValueError(f"cannot fit {unknown}; choose from {list(FIT_PARAMS)}")
+        self.fit = list(fit)
+        b = {**FIT_PARAMS, **(bounds or {})}
+        self.lo = np.array([b[k][0] for k in self.fit], dtype=np.float64)
+        self.hi = np.array([b[k][1] for k in self.fit], dtype=np.float64)
+        base = replace(base_config, deterministic=True)
+        self._plan = plan_batch(
+            [Scenario(id=str(i), attacker_build=o.attacker_build, defender_build=o.defender_build,
+                      config=replace(base, duration_s=o.duration_s, target_count=o.target_count)) for i, o in enumerate(observations)],
+            heroes=heroes, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes,
+        )
+        self._ids = [str(i) for i in range(len(observations))]
+        self.workers = workers
+        self._cache: Dict[Tuple[float, ...], np.ndarray] = {}
+        self._log_obs = np.log([o.damage for o in observations])
+        self._sqrt_w = np.sqrt([max(0.0, o.weight) for o in observations])
+        self.evaluations = 0
+
+    def _params(self, u: np.ndarray) -> Dict[str, float]:
+        x = self.lo + np.clip(u, 0.0, 1.0) * (self.hi - self.lo)
+        return dict(zip(self.fit, (float(v) for v in x)))
+
+    def residuals(self, params: Dict[str, float]) -> np.ndarray:
+        """Weighted log errors of every observation under `params`."""
+        key = tuple(float(params[k]) for k in sorted(params))
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        self.evaluations += 1
+        plan = replace(self._plan, jobs=[(hero, att, dfn, replace(cfg, **params)) for hero, att, dfn, cfg in self._plan.jobs])
+        results = run_plan(plan, workers=self.workers)
+        sims = np.array([results[i]["total_damage"] for i in self._ids])
+        r = self._sqrt_w * (np.log(np.maximum(sims, 1e-9)) - self._log_obs)
+        self._cache[key] = r
+        return r
+
+    def _loss(self, u: np.ndarray) -> float:
+        r = self.residuals(self._params(u))
+        return float(r @ r)
+
+    def _nelder_mead(self, u0: np.ndarray, *, step: float = 0.15, iters: int = 200, tol: float = 1e-10) -> Tuple[np.ndarray, float]:
+        p = len(u0)
+        pts = [np.clip(u0, 0, 1)] + [np.clip(u0 + step * np.eye(p)[i] * (1 if u0[i] < 0.5 else -1), 0, 1) for i in range(p)]
+        vals = [self._loss(x) for x in pts]
+        for _ in range(iters):
+            order = np.argsort(vals)
+            pts, vals = [pts[i] for i in order], [vals[i] for i in order]
+            if vals[-1] - vals[0] <= tol * (1.0 + abs(vals[0])):
+                break
+            centroid = np.mean(pts[:-1], axis=0)
+            xr = np.clip(centroid + (centroid - pts[-1]), 0, 1)
+            fr = self._loss(xr)
+            if fr < vals[0]:
+                xe = np.clip(centroid + 2.0 * (centroid - pts[-1]), 0, 1)
+                fe = self._loss(xe)
+                pts[-1], vals[-1] = (xe, fe) if fe < fr else (xr, fr)
+            elif fr < vals[-2]:
+                pts[-1], vals[-1] = xr, fr
+            else:
+                xc = centroid + 0.5 * (pts[-1] - centroid)
+                fc = self._loss(xc)
+                if fc < vals[-1]:
+                    pts[-1], vals[-1] = xc, fc
+                else:
+                    pts = [pts[0]] + [pts[0] + 0.5 * (x - pts[0]) for x in pts[1:]]
+                    vals = [vals[0]] + [self._loss(x) for x in pts[1:]]
+        best = int(np.argmin(vals))
+        return pts[best], vals[best]
+
+    def _moved(self, u: np.ndarray, j: int, x: float, r0: np.ndarray) -> bool:
+        v = u.copy()
+        v[j] = x
+        return not np.array_equal(self.residuals(self._params(v)), r0)
+
+    def _is_piecewise(self, u: np.ndarray, j: int, r0: np.ndarray) -> bool:
+        """True when tiny moves of parameter j leave every simulated damage exactly unchanged."""
+        steps = [d for h in (1e-4, 1e-3) for d in (u[j] - h, u[j] + h) if 0.0 <= d <= 1.0]
+        return any(not self._moved(u, j, d, r0) for d in steps)
+
+    def _plateau(self, u: np.ndarray, j: int, r0: np.ndarray) -> Tuple[float, float]:
+        """Unit-box range of parameter j (others fixed) that reproduces r0 exactly, edges found by bisection."""
+        edges = []
+        for sign in (-1.0, 1.0):
+            inside, h = u[j], 1e-3
+            outside = None
+            while outside is None:
+                x = min(1.0, max(0.0, u[j] + sign * h))
+                if self._moved(u, j, x, r0):
+                    outside = x
+                elif x in (0.0, 1.0):
+                    break
+                else:
+                    inside, h = x, h * 2
+            for _ in range(20 if outside is not None else 0):
+                mid = 0.5 * (inside + outside)
+                if self._moved(u, j, mid, r0):
+                    outside = mid
+                else:
+                    inside = mid
+            edges.append(inside)
+        return edges[0], edges[1]
+
+    def _slice_interval(self, u: np.ndarray, j: int, plateau: Tuple[float, float], limit: float, step: float = 1 / 64) -> Tuple[float, float]:
+        """Unit-box range around the plateau where the loss (others fixed) stays under `limit`:
+        walk out in `step`s until it is exceeded, then bisect the crossing."""
+        def ok(x: float) -> bool:
+            v = u.copy()
+            v[j] = x
+            r = self.residuals(self._params(v))
+            return float(r @ r) <= limit
+
+        edges = []
+        for sign, inside in ((-1.0, plateau[0]), (1.0, plateau[1])):
+            outside = None
+            while outside is None and 0.0 < inside < 1.0:
+                x = min(1.0, max(0.0, inside + sign * step))
+                if ok(x):
+                    inside = x
+                else:
+                    outside = x
+            for _ in range(12 if outside is not None else 0):
+                mid = 0.5 * (inside + outside)
+                if ok(mid):
+                    inside = mid
+                else:
+                    outside = mid
+            edges.append(inside)
+        return edges[0], edges[1]
+
+    def _uncertainty(self, u: np.ndarray, r0: np.ndarray) -> Tuple[Dict[str, Optional[float]], List[str], Dict[str, Tuple[float, float]], Dict[str, Tuple[float, float]]]:
+        n, p = len(r0), len(self.fit)
+        dof = max(1, n - p)
+        loss = float(r0 @ r0)
+        s2 = loss / dof
+        piecewise = [j for j in range(p) if self._is_piecewise(u, j, r0)]
+        smooth = [j for j in range(p) if j not in piecewise]
+        std: Dict[str, Optional[float]] = {k: None for k in self.fit}
+        if smooth:
+            span = self.hi - self.lo
+            jac = np.zeros((n, len(smooth)))
+            for c, j in enumerate(smooth):
+                h = 0.02
+                up, dn = u.copy(), u.copy()
+                up[j], dn[j] = min(1.0, u[j] + h), max(0.0, u[j] - h)
+                width = (up[j] - dn[j]) * span[j]
+                if width > 0:
+                    jac[:, c] = (self.residuals(self._params(up)) - self.residuals(self._params(dn))) / width
+            cov = s2 * np.linalg.pinv(jac.T @ jac)
+            for c, j in enumerate(smooth):
+                if np.any(jac[:, c]):
+                    std[self.fit[j]] = math.sqrt(max(0.0, cov[c, c]))
+        limit = loss * (1.0 + CHI2_95 / dof)
+        plateaus: Dict[str, Tuple[float, float]] = {}
+        intervals: Dict[str, Tuple[float, float]] = {}
+        for j in piecewise:
+            unit = self._plateau(u, j, r0)
+            k, lo, span = self.fit[j], self.lo[j], self.hi[j] - self.lo[j]
+            plateaus[k] = (float(lo + unit[0] * span), float(lo + unit[1] * span))
+            a, b = self._slice_interval(u, j, unit, limit)
+            intervals[k] = (float(lo + a * span), float(lo + b * span))
+        return std, [self.fit[j] for j in piecewise], plateaus, intervals
+
+    def fit_params(self, *, samples: int = 64, starts: int = 3, seed: int = 0) -> CalibrationResult:
+        rng = np.random.default_rng(seed)
+        p = len(self.fit)
+        # Latin hypercube in the unit box
+        lhs = (np.argsort(rng.random((samples, p)), axis=0) + rng.random((samples, p))) / samples
+        scored = sorted(((self._loss(u), i) for i, u in enumerate(lhs)))
+        best_u, best_f = lhs[scored[0][1]], scored[0][0]
+        for _, i in scored[:starts]:
+            u, f = self._nelder_mead(lhs[i])
+            # Restart with a fresh simplex until it stops improving: plateaus (whole casts) collapse simplices early
+            for step in (0.05, 0.02):
+                u2, f2 = self._nelder_mead(u, step=step)
+                if f2 < f:
+                    u, f = u2, f2
+            if f < best_f:
+                best_u, best_f = u, f
+        params = self._params(best_u)
+        r = self.residuals(params)
+        std, piecewise, plateaus, intervals = self._uncertainty(np.clip(best_u, 0, 1), r)
+        w2 = float((self._sqrt_w ** 2).sum()) or 1.0
+        return CalibrationResult(params=params, std=std, rmse_log=math.sqrt(float(r @ r) / w2),
+                                 evaluations=self.evaluations, residuals=[float(x) for x in r / np.maximum(self._sqrt_w, 1e-12)],
+                                 piecewise=piecewise, plateaus=plateaus, intervals=intervals)
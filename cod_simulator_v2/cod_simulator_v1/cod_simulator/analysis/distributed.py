@@ -0,0 +1,243 @@
+from __future__ import annotations
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from ..engine.models import Hero, Artifact, Pet, TalentNode, SimConfig
+from ..io.catalog import catalog_hash
+from ..io.json_loader import parse_build
+from .batch import Scenario, plan_batch, run_plan
+
+"""
+Distributed batch runs over plain TCP.
+
+A Coordinator listens on a socket and hands out chunks of scenarios. Each
+worker (run_worker, one per process or machine) connects, sends the content
+hash of its catalogs, and is turned away unless it matches the coordinator's.
+It then loops: receive a chunk, simulate it with plan_batch/run_plan
+(duplicates inside a chunk collapse as usual), send the results back.
+Messages are length-prefixed JSON; scenarios travel as builds and configs, so
+every worker resolves stats from its own catalog copy.
+
+A chunk belongs to one worker until its results arrive. If the connection
+drops or no answer comes within `timeout`, the chunk goes back on the queue
+for the next worker; a chunk that completes twice is only reported once.
+A worker whose connection breaks (e.g. the coordinator timed out its chunk and
+hung up mid-send) reconnects and carries on; once the coordinator is gone it
+returns normally.
+Coordinator.results() yields (scenario, result) as chunks complete, so a sweep
+can stream into a ResultStore without holding every result in memory.
+
+With `seed`, chunk i runs with its own seed derived from (seed, i): Monte Carlo
+results depend on chunk_size but not on which worker ran which chunk.
+"""
+
+MAX_MESSAGE = 256 << 20
+_HEADER = struct.Struct(">I")
+
+def _send(conn: socket.socket, msg: Dict[str, Any]) -> None:
+    raw = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+    conn.sendall(_HEADER.pack(len(raw)) + raw)
+
+def _recv_exact(conn: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        part = conn.recv(n - len(buf))
+        if not part:
+            raise ConnectionError("connection closed")
+        buf += part
+    return bytes(buf)
+
+def _recv(conn: socket.socket) -> Dict[str, Any]:
+    (n,) = _HEADER.unpack(_recv_exact(conn, _HEADER.size))
+    if n > MAX_MESSAGE:
+        raise ValueError(f"message of {n} bytes exceeds MAX_MESSAGE")
+    return json.loads(_recv_exact(conn, n).decode("utf-8"))
+
+def encode_scenario(sc: Scenario) -> Dict[str, Any]:
+    return {"id": sc.id, "attacker": asdict(sc.attacker_build), "defender": asdict(sc.defender_build), "config": asdict(sc.config)}
+
+def decode_scenario(d: Dict[str, Any]) -> Scenario:
+    return Scenario(id=str(d["id"]), attacker_build=parse_build(d["attacker"]), defender_build=parse_build(d["defender"]), config=SimConfig(**d["config"]))
+
+class Coordinator:
+    def __init__(
+        self,
+        scenarios: List[Scenario],
+        catalog: str,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        chunk_size: int = 64,
+        seed: Optional[int] = None,
+        timeout: float = 300.0,
+    ) -> None:
+        """`catalog` is catalog_hash() of the catalogs the scenarios refer to; port=0 picks a free port (see .address)."""
+        ids = [sc.id for sc in scenarios]
+        if len(set(ids)) != len(ids):
+            raise ValueError("scenario ids must be unique")
+        step = max(1, int(chunk_size))
+        self.chunks: List[List[Scenario]] = [scenarios[i:i + step] for i in range(0, len(scenarios), step)]
+        self.catalog = catalog
+        self.seed = seed
+        self.timeout = timeout
+        self.requeued = 0
+        self._todo: "queue.Queue[int]" = queue.Queue()
+        for i in range(len(self.chunks)):
+            self._todo.put(i)
+        self._done: Set[int] = set()
+        self._out: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._sock = socket.create_server((host, port))
+        self.address: Tuple[str, int] = self._sock.getsockname()[:2]
+        self._acceptor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._acceptor is None:
+            self._acceptor = threading.Thread(target=self._accept, daemon=True)
+            self._acceptor.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._sock.close()
+
+    def __enter__(self) -> "Coordinator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _accept(self) -> None:
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _finished(self) -> bool:
+        with self._lock:
+            return len(self._done) == len(self.chunks)
+
+    def _next_chunk(self) -> Optional[int]:
+        # Idle workers wait while chunks are out elsewhere: a failure there puts work back.
+        while not self._finished() and not self._closed.is_set():
+            try:
+                i = self._todo.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if i not in self._done:
+                    return i
+        return None
+
+    def _serve(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(self.timeout)
+            try:
+                hello = _recv(conn)
+                if hello.get("catalog") != self.catalog:
+                    _send(conn, {"type": "error", "message": "catalog hash mismatch; sync the data directory"})
+                    return
+            except (OSError, ValueError):
+                return
+            while True:
+                i = self._next_chunk()
+                if i is None:
+                    try:
+                        _send(conn, {"type": "done"})
+                    except OSError:
+                        pass
+                    return
+                seed = None if self.seed is None else self.seed * 1_000_003 + i
+                try:
+                    _send(conn, {"type": "chunk", "id": i, "seed": seed, "scenarios": [encode_scenario(sc) for sc in self.chunks[i]]})
+                    msg = _recv(conn)
+                    if msg.get("type") != "result" or msg.get("id") != i:
+                        raise ValueError(f"unexpected reply {msg.get('type')!r}")
+                    results = msg["results"]
+                    missing = [sc.id for sc in self.chunks[i] if sc.id not in results]
+                    if missing:
+                        raise ValueError(f"chunk {i} missing results for {missing[:3]}")
+                except (OSError, ValueError, KeyError):
+                    with self._lock:
+                        self.requeued += 1
+                    self._todo.put(i)
+                    return
+                with self._lock:
+                    if i in self._done:
+                        continue
+                    self._done.add(i)
+                self._out.put((i, results))
+
+    def results(self, *, timeout: Optional[float] = None) -> Iterator[Tuple[Scenario, Dict[str, Any]]]:
+        """Yield (scenario, result) as chunks complete (completion order), then close.
+
+        `timeout` bounds the wait for each next chunk (None: wait for workers indefinitely).
+        """
+        self.start()
+        try:
+            for _ in range(len(self.chunks)):
+                try:
+                    i, res = self._out.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"no chunk completed within {timeout}s ({len(self._done)}/{len(self.chunks)} done)") from None
+                for sc in self.chunks[i]:
+                    yield sc, res[sc.id]
+        finally:
+            self.close()
+
+def run_worker(
+    address: Tuple[str, int],
+    *,
+    heroes: Dict[str, Hero],
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+    workers: int = 1,
+    mode: str = "serial",
+    retries: int = 3,
+    retry_delay: float = 1.0,
+) -> int:
+    """Run chunks from the coordinator at `address` until it reports done; returns the number of chunks run.
+
+    A dropped connection is retried up to `retries` times in a row, `retry_delay` seconds apart; a
+    coordinator that can no longer be reached after a first successful connection counts as finished.
+    """
+    res = dict(artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    catalog = catalog_hash(heroes, artifacts, pets, talent_nodes)
+    done, failures, connected = 0, 0, False
+    while True:
+        try:
+            conn = socket.create_connection(tuple(address))
+        except OSError:
+            if not connected:
+                raise
+            return done  # coordinator finished and closed its socket
+        connected = True
+        with conn:
+            try:
+                _send(conn, {"type": "hello", "catalog": catalog})
+                while True:
+                    msg = _recv(conn)
+                    if msg["type"] == "done":
+                        return done
+                    if msg["type"] == "error":
+                        raise ValueError(f"coordinator refused worker: {msg['message']}")
+                    plan = plan_batch([decode_scenario(s) for s in msg["scenarios"]], heroes=heroes, **res)
+                    _send(conn, {"type": "result", "id": msg["id"], "results": run_plan(plan, workers=workers, mode=mode, seed=msg["seed"])})
+                    done += 1
+                    failures = 0
+            except OSError:
+                # BrokenPipe/ConnectionReset: the coordinator dropped us (chunk timed out, or it finished);
+                # an unsent chunk has already been re-queued on its side.
+                failures += 1
+        if failures > retries:
+            return done
+        time.sleep(retry_delay)
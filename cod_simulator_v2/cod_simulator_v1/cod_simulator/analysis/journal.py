@@ -0,0 +1,131 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+from ..engine.models import Hero, Artifact, Pet, TalentNode
+from ..io.catalog import catalog_hash
+from .batch import Scenario, plan_batch, run_plan
+from .distributed import encode_scenario
+from .streaming import RunningMoments
+
+"""
+Checkpointed, resumable batch runs.
+
+run_checkpointed() cuts the scenario list into fixed segments of
+`checkpoint_every` scenarios and, after each segment, appends one line to a
+JSONL journal: the segment index, its scenario ids and the running aggregates
+(RunningMoments per group) so far. Each line is flushed and fsynced before the
+next segment starts.
+
+The first line records a hash of the job spec (scenarios, catalogs, seed,
+segment size). Rerunning with the same spec and journal skips every
+checkpointed segment, restores the aggregates from the last line and carries
+on. Segment boundaries and per-segment seeds depend only on the spec, so the
+final aggregates are identical to an uninterrupted run. A line torn by a crash
+is cut off and its segment redone; a journal from a different spec is refused.
+"""
+
+GROUP_BY = ("attacker", "defender", "scenario", None)
+
+def job_spec(scenarios: List[Scenario], catalog: str, *, seed: Optional[int], checkpoint_every: int, value: str, by: Optional[str]) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps({"catalog": catalog, "seed": seed, "every": checkpoint_every, "value": value, "by": by}, sort_keys=True).encode("utf-8"))
+    for sc in scenarios:
+        h.update(json.dumps(encode_scenario(sc), sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+class Journal:
+    def __init__(self, path: str | Path, spec: str) -> None:
+        """Open (or start) the journal at `path` for job `spec`; loads whatever a previous run checkpointed."""
+        self.path = Path(path)
+        self.spec = spec
+        self.done_segments: Set[int] = set()
+        self.done_ids: Set[str] = set()
+        self.state: Dict[str, Any] = {}
+        if not self.path.exists():
+            self._append({"spec": spec})
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            for n, line in enumerate(f):
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # torn tail from an interrupted write
+                if n == 0 and rec.get("spec") != spec:
+                    raise ValueError(f"{self.path}: journal belongs to a different job; remove it or use another path")
+                if n > 0:
+                    self.done_segments.add(int(rec["segment"]))
+                    self.done_ids.update(rec["ids"])
+                    self.state = rec["state"]
+                good += len(line)
+        if good == 0:
+            raise ValueError(f"{self.path}: journal has no readable header")
+        if good < self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def checkpoint(self, segment: int, ids: List[str], state: Dict[str, Any]) -> None:
+        self._append({"segment": segment, "ids": ids, "state": state})
+        self.done_segments.add(segment)
+        self.done_ids.update(ids)
+        self.state = state
+
+def _group(sc: Scenario, by: Optional[str]) -> str:
+    if by == "attacker":
+        return sc.attacker_build.hero_id
+    if by == "defender":
+        return sc.defender_build.hero_id
+    if by == "scenario":
+        return sc.id
+    return "all"
+
+def run_checkpointed(
+    scenarios: List[Scenario],
+    *,
+    heroes: Dict[str, Hero],
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+    journal: str | Path,
+    checkpoint_every: int = 256,
+    value: str = "dps",
+    by: Optional[str] = "attacker",
+    seed: Optional[int] = None,
+    workers: int = 1,
+    mode: str = "serial",
+    on_results: Optional[Callable[[List[Scenario], Dict[str, Dict[str, Any]]], None]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """RunningMoments summary of result[value] per group (attacker/defender hero id, scenario id, or "all").
+
+    `on_results(segment_scenarios, results_by_id)` sees each newly simulated segment before it is
+    checkpointed (e.g. to append rows to a ResultStore); a crash between the two replays that segment.
+    """
+    if by not in GROUP_BY:
+        raise ValueError(f"by must be one of {GROUP_BY}")
+    step = max(1, int(checkpoint_every))
+    spec = job_spec(scenarios, catalog_hash(heroes, artifacts, pets, talent_nodes), seed=seed, checkpoint_every=step, value=value, by=by)
+    jr = Journal(journal, spec)
+    moments: Dict[str, RunningMoments] = {k: RunningMoments(**v) for k, v in jr.state.items()}
+    res = dict(artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    for k, a in enumerate(range(0, len(scenarios), step)):
+        if k in jr.done_segments:
+            continue
+        seg = scenarios[a:a + step]
+        plan = plan_batch(seg, heroes=heroes, **res)
+        results = run_plan(plan, workers=workers, mode=mode, seed=None if seed is None else seed * 1_000_003 + k)
+        if on_results is not None:
+            on_results(seg, results)
+        for sc in seg:
+            moments.setdefault(_group(sc, by), RunningMoments()).add(float(results[sc.id][value]))
+        jr.checkpoint(k, [sc.id for sc in seg], {g: asdict(m) for g, m in moments.items()})
+    return {g: m.summary() for g, m in moments.items()}
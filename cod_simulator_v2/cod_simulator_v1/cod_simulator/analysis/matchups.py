@@ -0,0 +1,122 @@
+from __future__ import annotations
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
+from ..engine.stats import StatBlock, resolve_build_stats
+from ..engine.simulation import CombatSimulator
+
+"""
+Round-robin matchup matrix (every hero vs every hero).
+
+Each hero's final stats are resolved once from its reference build and shared
+by every pairing it takes part in. Pairs are evaluated in square tiles so a
+process pool gets a few large tasks instead of N^2 tiny ones.
+"""
+
+Tile = Tuple[int, int, int, int]  # row_start, row_end, col_start, col_end
+
+@dataclass
+class MatchupMatrix:
+    hero_ids: List[str]
+    dps: List[List[float]]  # dps[i][j] = hero i attacking hero j
+
+    def rankings(self) -> Dict[str, List[Dict[str, float]]]:
+        n = len(self.hero_ids)
+        rows = []
+        for i, hid in enumerate(self.hero_ids):
+            others = [j for j in range(n) if j != i] or [i]
+            dealt = sum(self.dps[i][j] for j in others) / len(others)
+            taken = sum(self.dps[j][i] for j in others) / len(others)
+            wins = sum(1 for j in others if j != i and self.dps[i][j] > self.dps[j][i])
+            rows.append({"hero_id": hid, "avg_dps_dealt": dealt, "avg_dps_taken": taken, "net": dealt - taken, "wins": wins})
+        return {
+            "offense": sorted(rows, key=lambda r: r["avg_dps_dealt"], reverse=True),
+            "defense": sorted(rows, key=lambda r: r["avg_dps_taken"]),
+            "overall": sorted(rows, key=lambda r: r["net"], reverse=True),
+        }
+
+    def write(self, out_dir: str | Path) -> Dict[str, Path]:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = {"matrix": out_dir/"matchup_matrix.json", "rankings": out_dir/"matchup_rankings.json"}
+        matrix = {"metric": "dps", "hero_ids": self.hero_ids, "rows": [[round(v, 3) for v in row] for row in self.dps]}
+        paths["matrix"].write_text(json.dumps(matrix, separators=(",", ":")), encoding="utf-8")
+        paths["rankings"].write_text(json.dumps(self.rankings(), indent=2), encoding="utf-8")
+        return paths
+
+def reference_stats(
+    heroes: Dict[str, Hero],
+    builds: Dict[str, Build],
+    *,
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+) -> Dict[str, StatBlock]:
+    """Final stats per hero; heroes without a reference build use a bare Build."""
+    return {
+        hid: resolve_build_stats(h, builds.get(hid) or Build(hero_id=hid), artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+        for hid, h in heroes.items()
+    }
+
+def _tiles(n: int, size: int) -> List[Tile]:
+    size = max(1, int(size))
+    return [(r, min(r + size, n), c, min(c + size, n)) for r in range(0, n, size) for c in range(0, n, size)]
+
+# Per-process state, set once by the pool initializer instead of pickled per tile.
+_WORKER: Dict[str, object] = {}
+
+def _init_worker(heroes: List[Hero], stats: List[StatBlock], config: SimConfig) -> None:
+    _WORKER["heroes"] = heroes
+    _WORKER["stats"] = stats
+    _WORKER["config"] = config
+
+def _eval_tile(tile: Tile) -> Tuple[Tile, List[List[float]]]:
+    return _eval_tile_with(_WORKER["heroes"], _WORKER["stats"], _WORKER["config"], tile)  # type: ignore[arg-type]
+
+def _eval_tile_with(heroes: List[Hero], stats: List[StatBlock], cfg: SimConfig, tile: Tile) -> Tuple[Tile, List[List[float]]]:
+    r0, r1, c0, c1 = tile
+    out: List[List[float]] = []
+    for i in range(r0, r1):
+        row = []
+        for j in range(c0, c1):
+            sim = CombatSimulator.from_stats(attacker_hero=heroes[i], attacker_stats=stats[i], defender_stats=stats[j], config=cfg)
+            row.append(float(sim.run()["dps"]))
+        out.append(row)
+    return tile, out
+
+def matchup_matrix(
+    heroes: Dict[str, Hero],
+    stats: Dict[str, StatBlock],
+    config: SimConfig,
+    *,
+    tile: int = 16,
+    workers: Optional[int] = None,
+) -> MatchupMatrix:
+    hero_ids = list(heroes.keys())
+    n = len(hero_ids)
+    hero_list = [heroes[h] for h in hero_ids]
+    stat_list = [stats[h] for h in hero_ids]
+    dps = [[0.0] * n for _ in range(n)]
+    tiles = _tiles(n, tile)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    pool: Optional[ProcessPoolExecutor] = None
+    if workers > 1 and len(tiles) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(hero_list, stat_list, config))
+        results = pool.map(_eval_tile, tiles)
+    else:
+        # In-process: no module globals, so concurrent calls from threads don't interfere
+        results = (_eval_tile_with(hero_list, stat_list, config, t) for t in tiles)
+
+    try:
+        for (r0, _, c0, _), block in results:
+            for di, row in enumerate(block):
+                dps[r0 + di][c0:c0 + len(row)] = row
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return MatchupMatrix(hero_ids=hero_ids, dps=dps)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from ..engine.models import Hero, SimConfig
+from ..engine.stats import DEFAULTS, StatBlock
+from ..engine.effects import STAT_KEYS, TARGET_ATTACKER, EFFECT_BUFF, EFFECT_DOT, EFFECT_RAGE, compile_skill_effects
+from ..engine.damage import damage_coefficient, expected_crit_multiplier
+from ..engine.simulation import CombatSimulator
+from ..engine.timeline import to_ticks
+
+"""
+Primary/secondary hero pairings ranked by branch and bound.
+
+A pairing fights as the primary hero (its final stats, rage cost and rotation)
+with the secondary adding its bonus stats (SECONDARY_STATS, relative to
+DEFAULTS), its skill_factor to every cast and its skill effects.
+
+pair_upper_bound() is a cheap ceiling on a pairing's dps: every attack event in
+the fight lands, rage is spent as fast as it can possibly arrive, every
+damage-increasing effect is permanently active at its maximum stack count,
+every damage-over-time effect runs its full duration at that peak coefficient
+and the defender's shield is ignored. rank_pairings() simulates pairs in descending
+bound order and stops as soon as the next bound cannot beat the current top-K.
+"""
+
+SECONDARY_STATS = ("crit_chance", "crit_damage", "skill_damage_bonus", "all_damage_bonus", "rage_bonus")
+# Effects that can only raise damage when positive on the attacker / negative on the defender
+_ATTACKER_UP = frozenset(("attack", "crit_chance", "crit_damage", "skill_damage_bonus", "all_damage_bonus", "rage_bonus"))
+_DEFENDER_DOWN = frozenset(("defense", "damage_reduction"))
+
+@dataclass(frozen=True)
+class Pairing:
+    primary: str
+    secondary: str
+    bound: float
+    dps: Optional[float] = None  # None until simulated
+
+def pair_hero(primary: Hero, secondary: Hero) -> Hero:
+    effects = primary.compiled_effects or compile_skill_effects(primary.id, primary.skill_effects)
+    effects += secondary.compiled_effects or compile_skill_effects(secondary.id, secondary.skill_effects)
+    return Hero(
+        id=f"{primary.id}+{secondary.id}",
+        name=f"{primary.name} / {secondary.name}",
+        rarity=primary.rarity,
+        rage_cost=primary.rage_cost,
+        base_stats=primary.base_stats,
+        skill_factor=primary.skill_factor + secondary.skill_factor,
+        skill_effects=list(primary.skill_effects) + list(secondary.skill_effects),
+        compiled_effects=effects,
+    )
+
+def pair_stats(primary: StatBlock, secondary: StatBlock) -> StatBlock:
+    s = dict(primary.stats)
+    for k in SECONDARY_STATS:
+        s[k] = primary.get(k) + secondary.get(k) - DEFAULTS.get(k, 0.0)
+    return StatBlock(s)
+
+def pair_upper_bound(hero: Hero, attacker: StatBlock, defender: StatBlock, config: SimConfig) -> float:
+    """Ceiling on CombatSimulator(hero, attacker vs defender, config).run()["dps"]."""
+    cfg = config
+    total_ticks = to_ticks(cfg.duration_s, cfg.tick_s, minimum=0)
+    attack_every = to_ticks(cfg.attack_interval_s, cfg.tick_s)
+    counter_every = to_ticks(cfg.counter_interval_s, cfg.tick_s)
+    effects = hero.compiled_effects or compile_skill_effects(hero.id, hero.skill_effects)
+
+    def events(window: int, every: int) -> int:
+        return -(-window // every) + 1
+
+    def rage_in(window: int, rage_bonus: float) -> float:
+        raw = events(window, attack_every) * cfg.rage_on_normal
+        if cfg.counter_enabled:
+            raw += events(window, counter_every) * cfg.rage_on_counter
+        return max(0.0, raw) * max(0.0, 1.0 + rage_bonus)
+
+    # Favourable buffs only; rage_bonus feeds the cast count, so settle it first.
+    fav = [(e, STAT_KEYS[e.stat]) for e in effects if e.kind == EFFECT_BUFF and (
+           (e.target == TARGET_ATTACKER and e.value > 0 and STAT_KEYS[e.stat] in _ATTACKER_UP)
+           or (e.target != TARGET_ATTACKER and e.value < 0 and STAT_KEYS[e.stat] in _DEFENDER_DOWN))]
+    # Each cast needs rage_cost minus whatever rage it hands back itself; one cast per attack/counter event at most.
+    net_cost = max(1, hero.rage_cost) - sum(e.value for e in effects if e.kind == EFFECT_RAGE and e.value > 0)
+    max_casts = -(-total_ticks // attack_every) + (-(-total_ticks // counter_every) if cfg.counter_enabled else 0)
+
+    def casts_in(window: int, rage_bonus: float) -> int:
+        if net_cost <= 0:
+            return max_casts
+        return min(max_casts, math.floor(rage_in(window, rage_bonus) / net_cost))
+
+    rage_bonus = attacker.get("rage_bonus")
+    casts = -1
+    for _ in range(64):
+        prev, casts = casts, (casts_in(total_ticks, rage_bonus) if total_ticks else 0)
+        if casts == prev:
+            break
+        rage_bonus = attacker.get("rage_bonus") + sum(
+            e.value * _stacks(e.duration_s, casts, cfg, rage_bonus, casts_in) for e, st in fav if st == "rage_bonus")
+
+    att, dfn = attacker.as_dict(), defender.as_dict()
+    for e, st in fav:
+        stacks = _stacks(e.duration_s, casts, cfg, rage_bonus, casts_in)
+        (att if e.target == TARGET_ATTACKER else dfn)[st] += e.value * stacks
+    coef = damage_coefficient(att, dfn, defense_constant=cfg.defense_constant)
+    if cfg.deterministic:
+        coef *= expected_crit_multiplier(att["crit_chance"], att["crit_damage"])
+    elif att["crit_chance"] > 0:
+        coef *= max(1.0, att["crit_damage"])
+    coef = max(0.0, coef)
+
+    attacks = -(-total_ticks // attack_every)
+    aoe = 1.0 + float(cfg.aoe_split_ratio) * max(0, cfg.target_count - 1)
+    total = attacks * coef * 0.5 + casts * coef * float(hero.skill_factor) / 1000.0 * aoe
+    # DoT never crits, so the crit-inclusive coefficient is a safe ceiling for it
+    dot = sum(e.value * to_ticks(e.duration_s, cfg.tick_s) * cfg.tick_s for e in effects if e.kind == EFFECT_DOT and e.value > 0)
+    total += casts * dot * coef
+    return total / max(1, cfg.duration_s)
+
+def _stacks(duration_s: float, casts: int, cfg: SimConfig, rage_bonus: float, casts_in) -> int:
+    """Most copies of one effect alive at once: casts inside one effect duration."""
+    if casts <= 0:
+        return 0
+    return min(casts, 2 + casts_in(to_ticks(duration_s, cfg.tick_s), rage_bonus))
+
+def rank_pairings(
+    heroes: Dict[str, Hero],
+    stats: Dict[str, StatBlock],
+    target: StatBlock,
+    config: SimConfig,
+    *,
+    top_k: int = 10,
+    primaries: Optional[List[str]] = None,
+) -> Tuple[List[Pairing], Dict[str, int]]:
+    """Best `top_k` (primary, secondary) pairs against `target` by simulated dps.
+
+    Returns the pairs (best first) and counters {"pairs", "simulated"}. Pairs
+    whose bound is below the K-th best simulated dps are never simulated.
+    """
+    ids = list(heroes)
+    cands: List[Tuple[float, str, str, Hero, StatBlock]] = []
+    for p in (primaries or ids):
+        for s in ids:
+            if s == p:
+                continue
+            hero, st = pair_hero(heroes[p], heroes[s]), pair_stats(stats[p], stats[s])
+            cands.append((pair_upper_bound(hero, st, target, config), p, s, hero, st))
+    cands.sort(key=lambda c: c[0], reverse=True)
+
+    best: List[Tuple[float, int, Pairing]] = []  # min-heap of the current top-K
+    simulated = 0
+    for n, (bound, p, s, hero, st) in enumerate(cands):
+        if len(best) >= top_k and bound <= best[0][0]:
+            break
+        dps = float(CombatSimulator.from_stats(attacker_hero=hero, attacker_stats=st, defender_stats=target, config=config).run()["dps"])
+        simulated += 1
+        item = (dps, -n, Pairing(primary=p, secondary=s, bound=bound, dps=dps))
+        if len(best) < top_k:
+            heapq.heappush(best, item)
+        elif dps > best[0][0]:
+            heapq.heapreplace(best, item)
+    ranked = [pr for _, _, pr in sorted(best, reverse=True)]
+    return ranked, {"pairs": len(cands), "simulated": simulated}
@@ -0,0 +1,216 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+"""
+Constant-memory statistics for Monte Carlo runs.
+
+Feed each run() result to MonteCarloStats.add() instead of keeping the dicts.
+Every accumulator is mergeable (merge() combines two workers' partial results,
+order independent up to float rounding) and picklable, so per-process
+accumulators can be shipped back and folded together.
+"""
+
+SOURCES = ("normal", "skill", "aoe_extra", "dot")
+
+@dataclass
+class RunningMoments:
+    """Count/mean/variance/min/max via Welford, merged with Chan's formula."""
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.min, self.max = other.n, other.mean, other.m2, other.min, other.max
+            return
+        n = self.n + other.n
+        d = other.mean - self.mean
+        self.mean += d * other.n / n
+        self.m2 += other.m2 + d * d * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def summary(self) -> Dict[str, float]:
+        return {"n": self.n, "mean": self.mean, "std": self.std,
+                "min": self.min if self.n else 0.0, "max": self.max if self.n else 0.0}
+
+@dataclass
+class QuantileSketch:
+    """Relative-error quantile sketch (DDSketch-style log buckets).
+
+    Quantiles are within `rel_accuracy` of a true sample value. Memory is bounded
+    by `max_buckets`: when exceeded, the lowest buckets collapse together, which
+    only costs accuracy at the extreme low tail.
+    """
+    rel_accuracy: float = 0.01
+    max_buckets: int = 2048
+    buckets: Dict[int, int] = field(default_factory=dict)
+    zeros: int = 0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self._gamma = (1.0 + self.rel_accuracy) / (1.0 - self.rel_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, x: float, weight: int = 1) -> None:
+        self.count += weight
+        if x <= 0.0:
+            # Damage/DPS are non-negative; treat anything <= 0 as exactly zero.
+            self.zeros += weight
+            return
+        k = math.ceil(math.log(x) / self._log_gamma)
+        self.buckets[k] = self.buckets.get(k, 0) + weight
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        self.buckets[target] += sum(self.buckets.pop(k) for k in keys[:excess])
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.rel_accuracy != self.rel_accuracy:
+            raise ValueError("cannot merge sketches with different rel_accuracy")
+        self.count += other.count
+        self.zeros += other.zeros
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = min(max(q, 0.0), 1.0) * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if rank < seen:
+                return 2.0 * self._gamma ** k / (self._gamma + 1.0)
+        return 2.0 * self._gamma ** max(self.buckets) / (self._gamma + 1.0)
+
+@dataclass
+class FixedHistogram:
+    """`bins` equal-width bins over [lo, hi) plus underflow/overflow counters."""
+    lo: float
+    hi: float
+    bins: int = 50
+    counts: List[int] = field(default_factory=list)
+    underflow: int = 0
+    overflow: int = 0
+
+    def __post_init__(self) -> None:
+        if self.hi <= self.lo:
+            raise ValueError("histogram needs hi > lo")
+        if not self.counts:
+            self.counts = [0] * self.bins
+
+    def add(self, x: float) -> None:
+        if x < self.lo:
+            self.underflow += 1
+        elif x >= self.hi:
+            self.overflow += 1
+        else:
+            self.counts[int((x - self.lo) / (self.hi - self.lo) * self.bins)] += 1
+
+    def merge(self, other: "FixedHistogram") -> None:
+        if (other.lo, other.hi, other.bins) != (self.lo, self.hi, self.bins):
+            raise ValueError("cannot merge histograms with different binning")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def edges(self) -> List[float]:
+        w = (self.hi - self.lo) / self.bins
+        return [self.lo + i * w for i in range(self.bins + 1)]
+
+class MonteCarloStats:
+    """Streaming summary of many CombatSimulator.run() results.
+
+    `hist_range` fixes histogram bounds for dps; workers whose results will be
+    merged must use the same bounds (and the same sketch accuracy).
+    """
+    def __init__(self, *, rel_accuracy: float = 0.01, hist_range: Optional[tuple] = None, hist_bins: int = 50) -> None:
+        self.dps = RunningMoments()
+        self.total = RunningMoments()
+        self.final_rage = RunningMoments()
+        self.by_source = {src: RunningMoments() for src in SOURCES}
+        self.sketch = QuantileSketch(rel_accuracy=rel_accuracy)
+        self.histogram = FixedHistogram(hist_range[0], hist_range[1], hist_bins) if hist_range else None
+
+    def add(self, result: Dict[str, Any]) -> None:
+        dps = float(result["dps"])
+        self.dps.add(dps)
+        self.total.add(float(result["total_damage"]))
+        self.final_rage.add(float(result.get("final_rage", 0.0)))
+        breakdown = result.get("breakdown", {})
+        for src, acc in self.by_source.items():
+            acc.add(float(breakdown.get(src, 0.0)))
+        self.sketch.add(dps)
+        if self.histogram is not None:
+            self.histogram.add(dps)
+
+    def extend(self, results: Iterable[Dict[str, Any]]) -> "MonteCarloStats":
+        for r in results:
+            self.add(r)
+        return self
+
+    def merge(self, other: "MonteCarloStats") -> "MonteCarloStats":
+        # Check compatibility before touching any accumulator, so a failed merge changes nothing.
+        if other.sketch.rel_accuracy != self.sketch.rel_accuracy:
+            raise ValueError("cannot merge sketches with different rel_accuracy")
+        if (self.histogram is None) != (other.histogram is None):
+            raise ValueError("cannot merge MonteCarloStats with and without a histogram")
+        if self.histogram is not None and (other.histogram.lo, other.histogram.hi, other.histogram.bins) != (self.histogram.lo, self.histogram.hi, self.histogram.bins):
+            raise ValueError("cannot merge histograms with different binning")
+        self.dps.merge(other.dps)
+        self.total.merge(other.total)
+        self.final_rage.merge(other.final_rage)
+        for src, acc in self.by_source.items():
+            acc.merge(other.by_source[src])
+        self.sketch.merge(other.sketch)
+        if self.histogram is not None:
+            self.histogram.merge(other.histogram)
+        return self
+
+    def quantiles(self, qs: Iterable[float] = (0.01, 0.5, 0.99)) -> Dict[str, float]:
+        return {f"p{q * 100:g}": self.sketch.quantile(q) for q in qs}
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "trials": self.dps.n,
+            "dps": {**self.dps.summary(), **self.quantiles()},
+            "total_damage": self.total.summary(),
+            "final_rage": self.final_rage.summary(),
+            "breakdown_mean": {src: acc.mean for src, acc in self.by_source.items()},
+        }
+        if self.histogram is not None:
+            out["dps_histogram"] = {"edges": self.histogram.edges(), "counts": list(self.histogram.counts),
+                                    "underflow": self.histogram.underflow, "overflow": self.histogram.overflow}
+        return out
@@ -0,0 +1,210 @@
+from __future__ import annotations
+import json
+import math
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..engine.models import Hero, SimConfig
+from ..engine.stats import StatBlock
+from ..engine.simulation import CombatSimulator
+from .batch import BatchPlan, run_plan
+
+"""
+Surrogate dps model for one hero/defender pairing.
+
+train_surrogate() samples the stat space (SURROGATE_STATS within `bounds`) with
+a Latin hypercube, simulates every point as one batch (deterministic config)
+and fits log(dps) by ridge least squares on quadratic terms of features taken
+from the damage formula: log attack, log(1 + bonus), log(1 - reduction),
+log(K / (K + defense)) and the log expected crit multiplier. Simulated dps is
+close to a product of those factors, so the quadratic terms only have to
+absorb rotation effects (shields, buffs). An independent uniform test sample
+gives the error metrics saved with the model.
+
+DpsSurrogate.dps() answers from the model inside the trained box and runs the
+real simulator outside it (when the hero is attached), so a query never
+silently extrapolates.
+"""
+
+# Stat -> side it is read from
+SURROGATE_STATS: Dict[str, str] = {
+    "attack": "attacker",
+    "crit_chance": "attacker",
+    "crit_damage": "attacker",
+    "skill_damage_bonus": "attacker",
+    "all_damage_bonus": "attacker",
+    "defense": "defender",
+    "damage_reduction": "defender",
+}
+DEFAULT_BOUNDS: Dict[str, Tuple[float, float]] = {
+    "attack": (500.0, 5000.0),
+    "crit_chance": (0.0, 1.0),
+    "crit_damage": (1.0, 3.0),
+    "skill_damage_bonus": (0.0, 1.0),
+    "all_damage_bonus": (0.0, 1.0),
+    "defense": (0.0, 5000.0),
+    "damage_reduction": (0.0, 0.8),
+}
+
+def latin_hypercube(n: int, lo: np.ndarray, hi: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    u = (np.argsort(rng.random((n, len(lo))), axis=0) + rng.random((n, len(lo)))) / n
+    return lo + u * (hi - lo)
+
+def _features(x: np.ndarray, names: Sequence[str], defense_constant: float) -> np.ndarray:
+    """Per-row physics features (one per stat plus the crit multiplier) for an (n, len(names)) array."""
+    col = {k: x[:, i] for i, k in enumerate(names)}
+    out: List[np.ndarray] = []
+    for k in names:
+        v = col[k]
+        if k == "attack":
+            out.append(np.log(np.maximum(v, 1e-9)))
+        elif k in ("skill_damage_bonus", "all_damage_bonus"):
+            out.append(np.log1p(np.maximum(v, -0.999)))
+        elif k == "damage_reduction":
+            out.append(np.log1p(-np.clip(v, 0.0, 0.95)))
+        elif k == "defense":
+            out.append(np.log(defense_constant / (defense_constant + np.maximum(v, 0.0))))
+        else:
+            out.append(v)
+    if "crit_chance" in col and "crit_damage" in col:
+        c = np.clip(col["crit_chance"], 0.0, 1.0)
+        out.append(np.log((1.0 - c) + c * np.maximum(col["crit_damage"], 1.0)))
+    return np.column_stack(out)
+
+def _quadratic(f: np.ndarray) -> np.ndarray:
+    n, d = f.shape
+    iu = np.triu_indices(d)
+    return np.column_stack([np.ones(n), f, (f[:, :, None] * f[:, None, :])[:, iu[0], iu[1]]])
+
+@dataclass
+class DpsSurrogate:
+    attacker_id: str
+    names: List[str]
+    bounds: Dict[str, Tuple[float, float]]
+    attacker_stats: Dict[str, float]    # everything not in `names` is held at these values
+    defender_stats: Dict[str, float]
+    config: SimConfig
+    mean: List[float]                   # feature standardisation
+    scale: List[float]
+    coef: List[float]
+    metrics: Dict[str, float] = field(default_factory=dict)
+    hero: Optional[Hero] = None         # enables the simulator fallback
+
+    def __post_init__(self) -> None:
+        # Query-time constants, so a single query is a handful of small array ops
+        base = {k: (self.attacker_stats if SURROGATE_STATS[k] == "attacker" else self.defender_stats).get(k, 0.0) for k in self.names}
+        self._base = [float(base[k]) for k in self.names]
+        self._lo = [self.bounds[k][0] for k in self.names]
+        self._hi = [self.bounds[k][1] for k in self.names]
+        self._mean, self._scale, self._coef = np.asarray(self.mean), np.asarray(self.scale), np.asarray(self.coef)
+
+    def _design(self, x: np.ndarray) -> np.ndarray:
+        return _quadratic((_features(x, self.names, self.config.defense_constant) - self._mean) / self._scale)
+
+    def _row(self, values: Dict[str, float]) -> List[float]:
+        row = list(self._base)
+        for k, v in values.items():
+            try:
+                row[self.names.index(k)] = float(v)
+            except ValueError:
+                raise ValueError(f"surrogate has no input {k!r}; inputs are {self.names}") from None
+        return row
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """Model dps for an (n, len(names)) array, no bounds check."""
+        return np.exp(self._design(np.atleast_2d(np.asarray(x, dtype=np.float64))) @ self._coef)
+
+    def in_bounds(self, values: Dict[str, float]) -> bool:
+        return all(lo <= v <= hi for lo, v, hi in zip(self._lo, self._row(values), self._hi))
+
+    def dps(self, values: Dict[str, float]) -> Tuple[float, str]:
+        """(dps, "model" | "sim") for stats in `values` (others at the trained base values)."""
+        row = self._row(values)
+        if all(lo <= v <= hi for lo, v, hi in zip(self._lo, row, self._hi)):
+            return float(self.predict(row)[0]), "model"
+        if self.hero is None:
+            raise ValueError("query outside the trained bounds and no hero attached for the simulator fallback")
+        att, dfn = dict(self.attacker_stats), dict(self.defender_stats)
+        for k, v in zip(self.names, row):
+            (att if SURROGATE_STATS[k] == "attacker" else dfn)[k] = float(v)
+        sim = CombatSimulator.from_stats(attacker_hero=self.hero, attacker_stats=StatBlock(att), defender_stats=StatBlock(dfn), config=self.config)
+        return float(sim.run()["dps"]), "sim"
+
+    def save(self, path: str | Path) -> None:
+        doc = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "hero"}
+        doc["config"] = asdict(self.config)
+        Path(path).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path, *, hero: Optional[Hero] = None) -> "DpsSurrogate":
+        d = json.loads(Path(path).read_text(encoding="utf-8"))
+        d["config"] = SimConfig(**d["config"])
+        d["bounds"] = {k: (float(lo), float(hi)) for k, (lo, hi) in d["bounds"].items()}
+        if hero is not None and hero.id != d["attacker_id"]:
+            raise ValueError(f"surrogate was trained for {d['attacker_id']!r}, not {hero.id!r}")
+        return cls(**d, hero=hero)
+
+def _simulate(hero: Hero, attacker: StatBlock, defender: StatBlock, config: SimConfig, names: List[str], x: np.ndarray, workers: int) -> np.ndarray:
+    plan = BatchPlan()
+    for i, row in enumerate(x):
+        att, dfn = dict(attacker.stats), dict(defender.stats)
+        for k, v in zip(names, row):
+            (att if SURROGATE_STATS[k] == "attacker" else dfn)[k] = float(v)
+        plan.jobs.append((hero, StatBlock(att), StatBlock(dfn), config))
+        plan.members.append([str(i)])
+    results = run_plan(plan, workers=workers)
+    return np.array([results[str(i)]["dps"] for i in range(len(x))])
+
+def train_surrogate(
+    hero: Hero,
+    attacker: StatBlock,
+    defender: StatBlock,
+    config: SimConfig,
+    *,
+    bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+    samples: int = 512,
+    test_samples: int = 128,
+    ridge: float = 1e-6,
+    seed: int = 0,
+    workers: int = 1,
+) -> DpsSurrogate:
+    """Fit a DpsSurrogate over `bounds` (default DEFAULT_BOUNDS, all SURROGATE_STATS)."""
+    b = dict(bounds) if bounds is not None else dict(DEFAULT_BOUNDS)
+    unknown = b.keys() - SURROGATE_STATS.keys()
+    if unknown:
+        raise ValueError(f"cannot vary {sorted(unknown)}; choose from {list(SURROGATE_STATS)}")
+    names = [k for k in SURROGATE_STATS if k in b]
+    lo = np.array([b[k][0] for k in names], dtype=np.float64)
+    hi = np.array([b[k][1] for k in names], dtype=np.float64)
+    cfg = replace(config, deterministic=True)
+    rng = np.random.default_rng(seed)
+    x = latin_hypercube(samples, lo, hi, rng)
+    x_test = lo + rng.random((test_samples, len(names))) * (hi - lo)
+    y = _simulate(hero, attacker, defender, cfg, names, np.vstack([x, x_test]), workers)
+    y, y_test = y[:samples], y[samples:]
+    if np.any(y <= 0):
+        raise ValueError("simulated dps is zero somewhere in the bounds; narrow them (e.g. attack > 0)")
+
+    f = _features(x, names, cfg.defense_constant)
+    mean, scale = f.mean(axis=0), f.std(axis=0)
+    scale[scale == 0] = 1.0
+    a = _quadratic((f - mean) / scale)
+    coef = np.linalg.solve(a.T @ a + ridge * np.eye(a.shape[1]), a.T @ np.log(y))
+    model = DpsSurrogate(
+        attacker_id=hero.id, names=names, bounds={k: (float(l), float(h)) for k, l, h in zip(names, lo, hi)},
+        attacker_stats=attacker.as_dict(), defender_stats=defender.as_dict(), config=cfg,
+        mean=mean.tolist(), scale=scale.tolist(), coef=coef.tolist(), hero=hero,
+    )
+    rel = model.predict(x_test) / np.maximum(y_test, 1e-12) - 1.0 if test_samples else np.zeros(0)
+    fit_rel = model.predict(x) / y - 1.0
+    ss = float(((y_test - y_test.mean()) ** 2).sum()) if test_samples else 0.0
+    model.metrics = {
+        "samples": samples,
+        "test_samples": test_samples,
+        "train_rms_rel_error": float(math.sqrt(np.mean(fit_rel ** 2))),
+        "test_rms_rel_error": float(math.sqrt(np.mean(rel ** 2))) if test_samples else math.nan,
+        "test_max_abs_rel_error": float(np.max(np.abs(rel))) if test_samples else math.nan,
+        "test_r2": 1.0 - float(((model.predict(x_test) - y_test) ** 2).sum()) / ss if ss > 0 else math.nan,
+    }
+    return model
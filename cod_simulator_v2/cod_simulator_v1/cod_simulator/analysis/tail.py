@@ -0,0 +1,182 @@
+from __future__ import annotations
+import math
+import random
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+from ..engine.models import Hero, SimConfig
+from ..engine.stats import StatBlock
+from ..engine.simulation import CombatSimulator
+
+"""
+Importance sampling for tail quantiles of Monte Carlo dps.
+
+Plain Monte Carlo needs on the order of 100/q trials before the q-quantile
+(q = 0.001: the worst fight in a thousand) is more than noise. Here crit rolls
+come from a biased distribution instead: CombatSimulator(crit_tilt=(normal,
+skill)) multiplies the crit odds of each hit by exp(tilt) and every trial
+carries its likelihood ratio w (result["log_weight"]). Negative tilts make crit
+droughts common, positive tilts crit streaks.
+
+The lower tail F(x) = P(dps <= x) is estimated by mean(w * [dps <= x]), which
+is unbiased at every x; the upper tail uses P(dps > x) the same way. The
+quantile is where that curve crosses q, and its confidence interval is where
+the pointwise normal interval of the curve crosses q. choose_tilt() picks the
+tilt from short pilot runs: the one with the smallest relative standard error
+at the estimated quantile.
+
+That interval is only as good as the weights inside the tail. The overall ESS
+says little here (it is dominated by the opposite tail, where w is huge), so
+the check is the tail ESS, (sum w 1[tail])^2 / sum (w 1[tail])^2, against the
+number of tail hits: too strong a tilt puts nearly every trial in the tail but
+lets a handful of them carry all the weight. choose_tilt() skips tilts whose
+pilot tail ESS is below `min_ess` of the hits, and estimate_tail() falls back to
+milder tilts (halving) when the full run still falls below it.
+"""
+
+Tilt = Tuple[float, float]
+
+@dataclass(frozen=True)
+class TailEstimate:
+    q: float                 # tail probability
+    upper: bool              # False: q-quantile (worst fights); True: (1 - q)-quantile (best fights)
+    value: float
+    ci_low: float
+    ci_high: float
+    trials: int
+    ess: float               # effective sample size, (sum w)^2 / sum w^2
+    tilt: Tilt = (0.0, 0.0)
+    tail_hits: int = 0       # trials in the tail at `value`
+    tail_ess: float = 0.0    # effective sample size of those trials' weights
+
+    def summary(self) -> Dict[str, Any]:
+        side = "p" + (f"{(1.0 - self.q) * 100:g}" if self.upper else f"{self.q * 100:g}")
+        return {"quantile": side, "dps": self.value, "ci95": [self.ci_low, self.ci_high],
+                "trials": self.trials, "ess": self.ess, "tail_hits": self.tail_hits, "tail_ess": self.tail_ess,
+                "tilt": list(self.tilt)}
+
+    def degenerate(self, min_ess: float) -> bool:
+        """True when the tail ESS is below `min_ess` of the tail hits (the interval cannot be trusted)."""
+        return self.tail_ess < min_ess * self.tail_hits
+
+def sample_tilted(
+    hero: Hero,
+    attacker: StatBlock,
+    defender: StatBlock,
+    config: SimConfig,
+    *,
+    trials: int,
+    tilt: Tilt,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(dps, log likelihood ratio) of `trials` Monte Carlo fights with biased crit rolls."""
+    cfg = replace(config, deterministic=False)
+    rng = random.Random(seed)
+    dps = np.empty(trials)
+    logw = np.empty(trials)
+    for i in range(trials):
+        r = CombatSimulator.from_stats(attacker_hero=hero, attacker_stats=attacker, defender_stats=defender,
+                                       config=cfg, rng=rng, crit_tilt=tuple(tilt)).run()
+        dps[i], logw[i] = r["dps"], r["log_weight"]
+    return dps, logw
+
+def tail_quantile(values: Sequence[float], log_weights: Sequence[float], q: float, *, upper: bool = False, z: float = 1.96, tilt: Tilt = (0.0, 0.0)) -> TailEstimate:
+    """Weighted tail quantile with a `z`-sigma interval (z=1.96: 95%)."""
+    if not 0.0 < q < 1.0:
+        raise ValueError("q must be in (0, 1)")
+    v = np.asarray(values, dtype=np.float64)
+    w = np.exp(np.asarray(log_weights, dtype=np.float64))
+    n = len(v)
+    if n == 0:
+        raise ValueError("no trials")
+    order = np.argsort(v, kind="stable")
+    v, w = v[order], w[order]
+    cw, cw2 = np.cumsum(w), np.cumsum(w * w)
+    # Evaluate the tail curve once per distinct value (end of each run of ties)
+    ends = np.flatnonzero(np.r_[v[1:] != v[:-1], True])
+    x = v[ends]
+    if upper:
+        m1, m2 = (cw[-1] - cw[ends]) / n, (cw2[-1] - cw2[ends]) / n   # P(dps > x), E[(w 1[dps > x])^2]
+    else:
+        m1, m2 = cw[ends] / n, cw2[ends] / n                          # P(dps <= x), E[(w 1[dps <= x])^2]
+    se = np.sqrt(np.maximum(m2 - m1 * m1, 0.0) / n)
+
+    def first(mask: np.ndarray) -> float:
+        hit = np.flatnonzero(mask)
+        return float(x[hit[0]]) if len(hit) else (math.inf if not upper else float(x[-1]))
+
+    if upper:
+        value, lo, hi = first(m1 <= q), first(m1 - z * se <= q), first(m1 + z * se <= q)
+    else:
+        value, lo, hi = first(m1 >= q), first(m1 + z * se >= q), first(m1 - z * se >= q)
+    ess = float(w.sum() ** 2 / max(float((w * w).sum()), 1e-300))
+    y = w[v > value] if upper else w[v <= value]
+    tail_ess = float(y.sum() ** 2 / (y * y).sum()) if len(y) else 0.0
+    return TailEstimate(q=q, upper=upper, value=value, ci_low=lo, ci_high=hi, trials=n, ess=ess, tilt=tuple(tilt),
+                        tail_hits=len(y), tail_ess=tail_ess)
+
+def _tilt(strength: float, upper: bool, skill_only: bool) -> Tilt:
+    t = strength if upper else -strength
+    return (0.0 if skill_only else t, t)
+
+def choose_tilt(
+    hero: Hero,
+    attacker: StatBlock,
+    defender: StatBlock,
+    config: SimConfig,
+    *,
+    q: float,
+    upper: bool = False,
+    skill_only: bool = False,
+    pilot: int = 200,
+    grid: Sequence[float] = (0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0),
+    min_ess: float = 0.1,
+    seed: Optional[int] = None,
+) -> Tilt:
+    """Tilt (normal, skill) with the smallest pilot relative standard error at the tail quantile,
+    among those whose pilot tail ESS is at least `min_ess` of the tail hits."""
+    best, best_err = (0.0, 0.0), math.inf
+    for k, strength in enumerate(grid):
+        tilt = _tilt(strength, upper, skill_only)
+        dps, logw = sample_tilted(hero, attacker, defender, config, trials=pilot, tilt=tilt,
+                                  seed=None if seed is None else seed * 1_000_003 + k)
+        est = tail_quantile(dps, logw, q, upper=upper, tilt=tilt)
+        if not math.isfinite(est.value) or est.degenerate(min_ess):
+            continue
+        # Relative error of the tail probability at the estimate, from the same pilot
+        hit = dps > est.value if upper else dps <= est.value
+        y = np.exp(logw) * hit
+        err = float(y.std() / (y.mean() * math.sqrt(pilot))) if y.mean() > 0 else math.inf
+        if err < best_err:
+            best, best_err = tilt, err
+    return best
+
+def estimate_tail(
+    hero: Hero,
+    attacker: StatBlock,
+    defender: StatBlock,
+    config: SimConfig,
+    *,
+    q: float,
+    upper: bool = False,
+    trials: int = 2000,
+    tilt: Optional[Tilt] = None,
+    skill_only: bool = False,
+    pilot: int = 200,
+    min_ess: float = 0.1,
+    seed: Optional[int] = None,
+) -> TailEstimate:
+    """Tail quantile of dps; tilt=None picks one with choose_tilt() first and, if the full run's
+    tail ESS is below `min_ess` of its tail hits, reruns with the tilt halved (down to plain sampling)."""
+    auto = tilt is None
+    if auto:
+        tilt = choose_tilt(hero, attacker, defender, config, q=q, upper=upper, skill_only=skill_only, pilot=pilot,
+                           min_ess=min_ess, seed=seed)
+    k = 0
+    while True:
+        dps, logw = sample_tilted(hero, attacker, defender, config, trials=trials, tilt=tilt, seed=None if seed is None else seed + 1 + k)
+        est = tail_quantile(dps, logw, q, upper=upper, tilt=tilt)
+        if not auto or tilt == (0.0, 0.0) or not est.degenerate(min_ess):
+            return est
+        tilt = tuple(0.0 if abs(t) < 0.25 else t / 2 for t in tilt)
+        k += 1
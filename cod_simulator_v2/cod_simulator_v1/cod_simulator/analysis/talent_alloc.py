@@ -0,0 +1,162 @@
+from __future__ import annotations
+from dataclasses import replace
+from typing import Dict, List, Tuple
+import numpy as np
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
+from ..engine.stats import resolve_build_stats
+from ..engine.simulation import CombatSimulator
+from .talent_preview import _bump
+
+"""
+Optimal talent ranks for every point budget (tree knapsack).
+
+Each node gets a value per rank count (values[node_id][r], r = 0..max_rank),
+either from stat weights or from the DPS gain of r ranks on their own. Nodes
+hang off their prereq, and a node can only take ranks when its prereq has at
+least one. allocate_talents() solves the whole forest bottom-up with max-plus
+convolutions of per-subtree "best value for at most b points" tables, so one
+pass yields the optimum for every budget 0..N.
+
+The optimum is exact for the given values. Values are additive across nodes,
+so DPS-derived values ignore interactions between nodes (first-order gains).
+"""
+
+Values = Dict[str, List[float]]
+NEG = -np.inf
+
+def rank_values_from_weights(talents: Dict[str, TalentNode], weights: Dict[str, float]) -> Values:
+    """value(r) = weight[stat] * value_per_rank * r."""
+    return {
+        n.id: [float(weights.get(n.stat, 0.0)) * n.value_per_rank * r for r in range(n.max_rank + 1)]
+        for n in talents.values()
+    }
+
+def rank_values_from_dps(
+    talents: Dict[str, TalentNode],
+    *,
+    side: str = "attacker",
+    attacker_hero: Hero,
+    defender_hero: Hero,
+    attacker_build: Build,
+    defender_build: Build,
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+    config: SimConfig,
+) -> Values:
+    """value(r) = DPS gained (attacker) or DPS no longer taken (defender) from r ranks of one node on a talent-free build."""
+    if side == "attacker":
+        attacker_build = replace(attacker_build, selected_talents={})
+    else:
+        defender_build = replace(defender_build, selected_talents={})
+    cfg = replace(config, deterministic=True)
+    res = dict(artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    att = resolve_build_stats(attacker_hero, attacker_build, **res)
+    dfn = resolve_build_stats(defender_hero, defender_build, **res)
+
+    def dps(a, d) -> float:
+        return CombatSimulator.from_stats(attacker_hero=attacker_hero, attacker_stats=a, defender_stats=d, config=cfg).run()["dps"]
+
+    base = dps(att, dfn)
+    out: Values = {}
+    for n in talents.values():
+        vals = [0.0]
+        for r in range(1, n.max_rank + 1):
+            bump = n.value_per_rank * r
+            if side == "attacker":
+                vals.append(dps(_bump(att, n.stat, bump), dfn) - base)
+            else:
+                vals.append(base - dps(att, _bump(dfn, n.stat, bump)))
+        out[n.id] = vals
+    return out
+
+def _forest(talents: Dict[str, TalentNode]) -> Tuple[List[str], Dict[str, List[str]]]:
+    children: Dict[str, List[str]] = {nid: [] for nid in talents}
+    roots: List[str] = []
+    for n in talents.values():
+        prereq = [p for p in (n.prereq or []) if p]
+        if len(prereq) > 1:
+            raise ValueError(f"talent {n.id!r} has several prereqs {prereq}; the allocator needs a prereq forest")
+        if not prereq:
+            roots.append(n.id)
+        elif prereq[0] not in talents:
+            raise ValueError(f"talent {n.id!r} requires unknown talent {prereq[0]!r}")
+        else:
+            children[prereq[0]].append(n.id)
+    # Every node must hang off a root; anything left over sits on a prereq cycle.
+    seen, stack = set(), list(roots)
+    while stack:
+        nid = stack.pop()
+        seen.add(nid)
+        stack.extend(children[nid])
+    if len(seen) != len(talents):
+        raise ValueError(f"talent prereq cycle among {sorted(set(talents) - seen)}")
+    return roots, children
+
+def _maxplus(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """c[t] = max_x a[t-x] + b[x] over 0 <= x <= t; also returns the best x."""
+    n = len(a)
+    t = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    grid = np.where(x <= t, a[np.clip(t - x, 0, n - 1)] + b[x], NEG)
+    best = grid.argmax(axis=1)
+    return grid[np.arange(n), best], best
+
+def allocate_talents(talents: Dict[str, TalentNode], values: Values, budget: int) -> List[Tuple[float, Dict[str, int]]]:
+    """(best value, selected_talents) for every budget 0..budget, index = budget."""
+    roots, children = _forest(talents)
+    n = int(budget) + 1
+    # Per node: table[b] = best value of its subtree with at most b points, node ranked >= 1
+    table: Dict[str, np.ndarray] = {}
+    rank_of: Dict[str, np.ndarray] = {}       # ranks given to the node itself, per b
+    splits: Dict[str, List[np.ndarray]] = {}  # points handed to each child, per remaining b
+
+    def combine(kids: List[str]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        acc = np.zeros(n)
+        steps: List[np.ndarray] = []
+        for c in kids:
+            # A child may also get nothing at all (value 0)
+            acc, x = _maxplus(acc, np.maximum(table[c], 0.0))
+            steps.append(x)
+        return acc, steps
+
+    order: List[str] = []
+    stack = list(roots)
+    while stack:
+        nid = stack.pop()
+        order.append(nid)
+        stack.extend(children[nid])
+    for nid in reversed(order):  # children before parents
+        node = talents[nid]
+        kids_best, splits[nid] = combine(children[nid])
+        vals = values.get(nid, [])
+        best = np.full(n, NEG)
+        choice = np.zeros(n, dtype=np.int64)
+        for r in range(1, min(node.max_rank, n - 1) + 1):
+            v = float(vals[r]) if r < len(vals) else NEG
+            cand = np.full(n, NEG)
+            cand[r:] = v + kids_best[:n - r]
+            better = cand > best
+            best[better] = cand[better]
+            choice[better] = r
+        table[nid], rank_of[nid] = best, choice
+    top, top_steps = combine(roots)
+
+    def assign(kids: List[str], steps: List[np.ndarray], b: int, out: Dict[str, int]) -> None:
+        for c, x in zip(reversed(kids), reversed(steps)):
+            pts = int(x[b])
+            b -= pts
+            if pts > 0 and table[c][pts] > 0.0:
+                fill(c, pts, out)
+
+    def fill(nid: str, b: int, out: Dict[str, int]) -> None:
+        r = int(rank_of[nid][b])
+        out[nid] = r
+        assign(children[nid], splits[nid], b - r, out)
+
+    result: List[Tuple[float, Dict[str, int]]] = []
+    for b in range(n):
+        sel: Dict[str, int] = {}
+        assign(roots, top_steps, b, sel)
+        result.append((float(top[b]), sel))
+    return result
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from dataclasses import replace
+from typing import Dict, Iterator, List, Tuple
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
+from ..engine.stats import StatBlock, resolve_build_stats
+from ..engine.simulation import CombatSimulator
+
+"""
+"One more rank" DPS gains for the talent editor.
+
+Both sides' final stats are resolved once for the current selection; each
+candidate rank is then a single stat bump on that StatBlock plus one run, so a
+whole tree is evaluated in one batch without rebuilding builds per node.
+"""
+
+def eligible_nodes(talents: Dict[str, TalentNode], selected: Dict[str, int]) -> List[TalentNode]:
+    """Nodes that can take one more rank (below max, prereqs ranked)."""
+    return [
+        n for n in talents.values()
+        if int(selected.get(n.id, 0)) < int(n.max_rank)
+        and all(int(selected.get(p, 0)) > 0 for p in (n.prereq or []))
+    ]
+
+def _bump(stats: StatBlock, stat: str, value: float) -> StatBlock:
+    s = dict(stats.stats)
+    s[stat] = s.get(stat, 0.0) + float(value)
+    return StatBlock(s)
+
+def iter_rank_gains(
+    *,
+    side: str,
+    selected: Dict[str, int],
+    nodes: List[TalentNode],
+    attacker_hero: Hero,
+    defender_hero: Hero,
+    attacker_build: Build,
+    defender_build: Build,
+    artifacts: Dict[str, Artifact],
+    pets: Dict[str, Pet],
+    talent_nodes: Dict[str, TalentNode],
+    config: SimConfig,
+) -> Iterator[Tuple[str, float]]:
+    """Yield (node_id, gain) per node as it is evaluated.
+
+    side="attacker": gain is the attacker's DPS increase. side="defender": gain is
+    the DPS the defender stops taking. Runs use expected-value crits so gains are
+    not noise.
+    """
+    if side == "attacker":
+        attacker_build = replace(attacker_build, selected_talents=dict(selected))
+    else:
+        defender_build = replace(defender_build, selected_talents=dict(selected))
+    cfg = replace(config, deterministic=True)
+    att = resolve_build_stats(attacker_hero, attacker_build, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+    dfn = resolve_build_stats(defender_hero, defender_build, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+
+    def dps(a: StatBlock, d: StatBlock) -> float:
+        return CombatSimulator.from_stats(attacker_hero=attacker_hero, attacker_stats=a, defender_stats=d, config=cfg).run()["dps"]
+
+    base = dps(att, dfn)
+    for node in nodes:
+        if side == "attacker":
+            yield node.id, dps(_bump(att, node.stat, node.value_per_rank), dfn) - base
+        else:
+            yield node.id, base - dps(att, _bump(dfn, node.stat, node.value_per_rank))
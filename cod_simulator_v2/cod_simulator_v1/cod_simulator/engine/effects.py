@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Any, Dict, List, NamedTuple, Tuple
+from .stats import DEFAULTS
+
+# Stat table used by compiled effects: effects refer to stats by index, not name.
+STAT_KEYS: Tuple[str, ...] = tuple(DEFAULTS.keys())
+STAT_INDEX: Dict[str, int] = {k: i for i, k in enumerate(STAT_KEYS)}
+
+TARGET_ATTACKER = 0
+TARGET_DEFENDER = 1
+_TARGETS = {"attacker": TARGET_ATTACKER, "defender": TARGET_DEFENDER}
+
+# Effect kinds. "debuff" compiles to a buff on the defender with the value negated.
+EFFECT_BUFF = 0
+EFFECT_DOT = 1     # damage over time: value = damage multiplier per second while active
+EFFECT_HEAL = 2    # heal over time: value = fraction of attacker attack healed per second
+EFFECT_SHIELD = 3  # instant shield grant of `value`
+EFFECT_RAGE = 4    # instant flat rage grant of `value`
+PERIODIC_KINDS = frozenset((EFFECT_DOT, EFFECT_HEAL))
+
+# type -> (kind, default target, allowed targets, needs a stat, needs a duration)
+_TYPES = {
+    "buff": (EFFECT_BUFF, "attacker", ("attacker", "defender"), True, True),
+    "debuff": (EFFECT_BUFF, "defender", ("attacker", "defender"), True, True),
+    "dot": (EFFECT_DOT, "defender", ("defender",), False, True),
+    "heal": (EFFECT_HEAL, "attacker", ("attacker",), False, True),
+    "shield": (EFFECT_SHIELD, "attacker", ("attacker",), False, False),
+    "rage": (EFFECT_RAGE, "attacker", ("attacker",), False, False),
+}
+
+class SkillEffectError(ValueError):
+    pass
+
+class CompiledEffect(NamedTuple):
+    target: int      # TARGET_ATTACKER / TARGET_DEFENDER
+    stat: int        # index into STAT_KEYS (-1 for effects without a stat)
+    value: float
+    duration_s: float
+    kind: int = EFFECT_BUFF
+
+def compile_effect(eff: Dict[str, Any]) -> CompiledEffect:
+    if not isinstance(eff, dict):
+        raise SkillEffectError(f"expected an object, got {type(eff).__name__}")
+    etype = eff.get("type")
+    if etype not in _TYPES:
+        raise SkillEffectError(f"unsupported type {etype!r} (expected one of {', '.join(_TYPES)})")
+    kind, default_target, targets, has_stat, has_duration = _TYPES[etype]
+    target = eff.get("target", default_target)
+    if target not in targets:
+        raise SkillEffectError(f"{etype}: unknown target {target!r} (expected {'/'.join(targets)})")
+    stat = eff.get("stat") if has_stat else None
+    if has_stat and stat not in STAT_INDEX:
+        raise SkillEffectError(f"unknown stat {stat!r}")
+    try:
+        value = float(eff.get("value", 0.0))
+        duration = float(eff.get("duration_s", 0)) if has_duration else 0.0
+    except (TypeError, ValueError) as e:
+        raise SkillEffectError(f"bad value/duration_s: {e}") from None
+    if has_duration and duration <= 0:
+        raise SkillEffectError(f"duration_s must be > 0, got {duration}")
+    if etype == "debuff":
+        value = -value
+    return CompiledEffect(target=_TARGETS[target], stat=STAT_INDEX[stat] if has_stat else -1, value=value, duration_s=duration, kind=kind)
+
+def compile_skill_effects(hero_id: str, effects: List[Dict[str, Any]]) -> Tuple[CompiledEffect, ...]:
+    out: List[CompiledEffect] = []
+    for i, eff in enumerate(effects or []):
+        try:
+            out.append(compile_effect(eff))
+        except SkillEffectError as e:
+            raise SkillEffectError(f"hero {hero_id!r} skill_effects[{i}]: {e}") from None
+    return tuple(out)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .effects import CompiledEffect
 
 @dataclass(frozen=True)
 class Hero:
@@ -11,6 +14,8 @@ class Hero:
     base_stats: Dict[str, float] = field(default_factory=dict)
     skill_factor: float = 0.0
     skill_effects: List[Dict[str, Any]] = field(default_factory=list)
+    # Filled by the loader from skill_effects (see effects.compile_skill_effects)
+    compiled_effects: Tuple["CompiledEffect", ...] = ()
 
 @dataclass(frozen=True)
 class Artifact:
@@ -59,3 +64,11 @@ class SimConfig:
     rage_on_normal: float = 94
     rage_on_counter: float = 16
     defense_constant: float = 1400.0
+    # Time resolution and action cadence; buff durations are rounded to whole ticks.
+    tick_s: float = 1.0
+    attack_interval_s: float = 1.0
+    counter_interval_s: float = 1.0
+    # Damage/heal-over-time effects pay out on this cadence.
+    periodic_interval_s: float = 1.0
+    # Deterministic runs: once the rotation repeats, extrapolate whole cycles instead of simulating them.
+    extrapolate_cycles: bool = True
@@ -1,30 +1,53 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 @dataclass
 class TimedModifier:
     stat: str
     value: float
-    remaining_s: int
+    expires_at: int  # timeline tick at which the modifier is removed
 
 class ModifierManager:
     def __init__(self) -> None:
         self._mods: List[TimedModifier] = []
+        # Bumped whenever the active set changes; lets callers cache derived values.
+        self.version = 0
 
-    def add(self, stat: str, value: float, duration_s: int) -> None:
-        if duration_s <= 0:
-            return
-        self._mods.append(TimedModifier(stat=stat, value=float(value), remaining_s=int(duration_s)))
+    def add(self, stat: str, value: float, duration_ticks: int, now: int = 0) -> Optional[int]:
+        """Add a modifier lasting duration_ticks from tick `now`; returns its expiry tick."""
+        if duration_ticks <= 0:
+            return None
+        expires_at = int(now) + int(duration_ticks)
+        self._mods.append(TimedModifier(stat=stat, value=float(value), expires_at=expires_at))
+        self.version += 1
+        return expires_at
 
-    def tick(self) -> None:
-        for m in list(self._mods):
-            m.remaining_s -= 1
-            if m.remaining_s <= 0:
-                self._mods.remove(m)
+    def expire(self, now: int) -> None:
+        kept = [m for m in self._mods if m.expires_at > now]
+        if len(kept) != len(self._mods):
+            self._mods = kept
+            self.version += 1
+
+    def __len__(self) -> int:
+        return len(self._mods)
 
     def snapshot(self) -> Dict[str, float]:
         out: Dict[str, float] = {}
         for m in self._mods:
             out[m.stat] = out.get(m.stat, 0.0) + m.value
         return out
+
+    def state(self) -> Tuple[Tuple[Tuple[str, float, int], ...], int]:
+        return tuple((m.stat, m.value, m.expires_at) for m in self._mods), self.version
+
+    def load_state(self, state: Tuple[Tuple[Tuple[str, float, int], ...], int]) -> None:
+        mods, self.version = state
+        self._mods = [TimedModifier(stat=st, value=v, expires_at=e) for st, v, e in mods]
+
+    def signature(self, now: int) -> Tuple[Tuple[str, float, int], ...]:
+        return tuple(sorted((m.stat, m.value, m.expires_at - now) for m in self._mods))
+
+    def shift(self, ticks: int) -> None:
+        for m in self._mods:
+            m.expires_at += ticks
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import math
+from typing import Dict, Optional
+import numpy as np
+from .timeline import to_ticks
+
+"""
+Per-run timeline recording (damage, rage, shield, active buffs over time).
+
+Arrays are allocated once, sized from duration_s / tick_s. Fights longer than
+`max_points` ticks are downsampled on the fly: each point covers
+`bucket_ticks` ticks, damage is summed into it and rage/shield/buff count keep
+the last value seen in it. Recording is driven by simulator events, so the cost
+follows the number of events rather than the number of ticks.
+"""
+
+class TimelineRecorder:
+    def __init__(
+        self,
+        duration_s: float,
+        tick_s: float = 1.0,
+        *,
+        max_points: int = 2000,
+        buffers: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        self.tick_s = float(tick_s)
+        self.total_ticks = to_ticks(duration_s, tick_s)
+        self.bucket_ticks = max(1, math.ceil(self.total_ticks / max(1, int(max_points))))
+        self.points = math.ceil(self.total_ticks / self.bucket_ticks)
+        n = self.points
+        if buffers is None:
+            buffers = {
+                "damage": np.zeros(n, dtype=np.float64),
+                "rage": np.zeros(n, dtype=np.float64),
+                "shield": np.zeros(n, dtype=np.float64),
+                "buffs": np.zeros(n, dtype=np.int32),
+            }
+        self.damage = buffers["damage"]
+        self.rage = buffers["rage"]
+        self.shield = buffers["shield"]
+        self.buffs = buffers["buffs"]
+        self._sampled = np.zeros(n, dtype=bool)
+
+    def add_damage(self, tick: int, amount: float) -> None:
+        b = tick // self.bucket_ticks
+        if b < self.points:
+            self.damage[b] += amount
+
+    def sample(self, tick: int, rage: float, shield: float, buffs: int) -> None:
+        b = tick // self.bucket_ticks
+        if b < self.points:
+            self.rage[b] = rage
+            self.shield[b] = shield
+            self.buffs[b] = buffs
+            self._sampled[b] = True
+
+    def finish(self) -> None:
+        """Carry state forward into points that saw no events."""
+        if self._sampled.all():
+            return
+        idx = np.where(self._sampled, np.arange(self.points), 0)
+        np.maximum.accumulate(idx, out=idx)
+        for arr in (self.rage, self.shield, self.buffs):
+            arr[:] = arr[idx]
+
+    @property
+    def bucket_s(self) -> float:
+        return self.bucket_ticks * self.tick_s
+
+    def time_s(self) -> np.ndarray:
+        return np.arange(self.points) * self.bucket_s
+
+    def dps(self) -> np.ndarray:
+        return self.damage / self.bucket_s
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The recorded buffers themselves (no copies)."""
+        return {"damage": self.damage, "rage": self.rage, "shield": self.shield, "buffs": self.buffs}
+
+class TimelineBatch:
+    """Row-per-trial buffers; recorder(i) writes straight into row i for cross-trial aggregation."""
+    def __init__(self, trials: int, duration_s: float, tick_s: float = 1.0, *, max_points: int = 2000) -> None:
+        probe = TimelineRecorder(duration_s, tick_s, max_points=max_points, buffers={k: np.empty(0) for k in ("damage", "rage", "shield", "buffs")})
+        self.duration_s, self.tick_s, self.max_points = duration_s, tick_s, max_points
+        self.bucket_s = probe.bucket_s
+        shape = (int(trials), probe.points)
+        self.damage = np.zeros(shape, dtype=np.float64)
+        self.rage = np.zeros(shape, dtype=np.float64)
+        self.shield = np.zeros(shape, dtype=np.float64)
+        self.buffs = np.zeros(shape, dtype=np.int32)
+
+    def recorder(self, i: int) -> TimelineRecorder:
+        rows = {"damage": self.damage[i], "rage": self.rage[i], "shield": self.shield[i], "buffs": self.buffs[i]}
+        return TimelineRecorder(self.duration_s, self.tick_s, max_points=self.max_points, buffers=rows)
+
+    def mean_dps(self) -> np.ndarray:
+        return self.damage.mean(axis=0) / self.bucket_s
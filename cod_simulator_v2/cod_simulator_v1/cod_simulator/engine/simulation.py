@@ -1,10 +1,40 @@
 from __future__ import annotations
-from typing import Dict, Any
+import math
+import random
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Iterable, List, Optional, Tuple, TYPE_CHECKING
 from .models import Hero, Artifact, Pet, TalentNode, Build, SimConfig
-from .stats import build_final_stats, StatBlock
+from .stats import resolve_build_stats, StatBlock
 from .rage import RageSystem
-from .damage import calculate_damage
+from .damage import damage_coefficient, expected_crit_multiplier, roll_is_crit
 from .modifiers import ModifierManager
+from .effects import STAT_KEYS, EFFECT_BUFF, EFFECT_DOT, EFFECT_SHIELD, EFFECT_RAGE, PERIODIC_KINDS, compile_skill_effects
+from .timeline import Timeline, to_ticks, EV_EXPIRE, EV_ATTACK, EV_COUNTER, EV_CAST, EV_PERIODIC
+
+if TYPE_CHECKING:
+    from .recorder import TimelineRecorder
+
+@dataclass(frozen=True)
+class SimSnapshot:
+    """Complete mutable state of a CombatSimulator at one tick (see snapshot()/fork())."""
+    tick: int
+    rage: float
+    def_shield: float
+    total_damage: float
+    breakdown: Tuple[Tuple[str, float], ...]
+    mod_att: Any
+    mod_def: Any
+    timeline: Any
+    cast_pending: bool
+    rng_state: Any
+    periodic: Any = None
+    support: Tuple[Tuple[str, float], ...] = ()
+    log_weight: float = 0.0
+
+# EV_EXPIRE payload for periodic effects (0/1 are modifier targets)
+_PERIODIC_EXPIRY = 2
+# Periodic channels
+_DOT, _HEAL = 0, 1
 
 class CombatSimulator:
     def __init__(
@@ -18,26 +48,60 @@ class CombatSimulator:
         pets: Dict[str, Pet],
         talent_nodes: Dict[str, TalentNode],
         config: SimConfig,
+        recorder: Optional["TimelineRecorder"] = None,
+        rng: Optional[random.Random] = None,
+        crit_tilt: Optional[Tuple[float, float]] = None,
     ) -> None:
+        attacker_base = resolve_build_stats(attacker_hero, attacker_build, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+        defender_base = resolve_build_stats(defender_hero, defender_build, artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+        self._setup(attacker_hero, attacker_base, defender_base, config, recorder, rng, crit_tilt)
+
+    @classmethod
+    def from_stats(
+        cls,
+        *,
+        attacker_hero: Hero,
+        attacker_stats: StatBlock,
+        defender_stats: StatBlock,
+        config: SimConfig,
+        recorder: Optional["TimelineRecorder"] = None,
+        rng: Optional[random.Random] = None,
+        crit_tilt: Optional[Tuple[float, float]] = None,
+    ) -> "CombatSimulator":
+        """Build a simulator from precomputed final stats (shared across many pairings)."""
+        sim = cls.__new__(cls)
+        sim._setup(attacker_hero, attacker_stats, defender_stats, config, recorder, rng, crit_tilt)
+        return sim
+
+    def _setup(self, attacker_hero: Hero, attacker_base: StatBlock, defender_base: StatBlock, config: SimConfig, recorder: Optional["TimelineRecorder"] = None, rng: Optional[random.Random] = None, crit_tilt: Optional[Tuple[float, float]] = None) -> None:
         self.cfg = config
-        self.time_s = 0
-
-        self.attacker_base: StatBlock = build_final_stats(
-            attacker_hero,
-            artifact=artifacts.get(attacker_build.artifact_id) if attacker_build.artifact_id else None,
-            pet=pets.get(attacker_build.pet_id) if attacker_build.pet_id else None,
-            talent_nodes=talent_nodes,
-            build=attacker_build,
-        )
-        self.defender_base: StatBlock = build_final_stats(
-            defender_hero,
-            artifact=artifacts.get(defender_build.artifact_id) if defender_build.artifact_id else None,
-            pet=pets.get(defender_build.pet_id) if defender_build.pet_id else None,
-            talent_nodes=talent_nodes,
-            build=defender_build,
-        )
+        if config.tick_s <= 0:
+            raise ValueError(f"tick_s must be > 0, got {config.tick_s}")
+        if recorder is not None and recorder.tick_s != config.tick_s:
+            raise ValueError("recorder tick_s does not match config.tick_s")
+        self.recorder = recorder
+        # Crit rolls use this RNG; each simulator gets its own unless one is passed (never the module-level random)
+        self.rng = rng if rng is not None else random.Random()
+        # Importance sampling (Monte Carlo only): crit odds of normal / skill hits are multiplied by
+        # exp(tilt) and log_weight accumulates log(true / biased probability) of every roll.
+        self.crit_tilt = crit_tilt
+        self.log_weight = 0.0
+        self.tick = 0
+
+        self.attacker_base: StatBlock = attacker_base
+        self.defender_base: StatBlock = defender_base
 
         self.attacker_hero = attacker_hero
+        # Heroes built outside the loader are compiled once here, never per cast.
+        effects = attacker_hero.compiled_effects
+        if not effects and attacker_hero.skill_effects:
+            effects = compile_skill_effects(attacker_hero.id, attacker_hero.skill_effects)
+        # (target, stat name, value, duration in ticks)
+        self.effects = tuple((e.target, STAT_KEYS[e.stat], e.value, to_ticks(e.duration_s, config.tick_s)) for e in effects if e.kind == EFFECT_BUFF)
+        # (kind, value) applied once per cast
+        self._instant = tuple((e.kind, e.value) for e in effects if e.kind in (EFFECT_SHIELD, EFFECT_RAGE))
+        # (channel, value per second, duration in ticks)
+        self._periodic = tuple((_DOT if e.kind == EFFECT_DOT else _HEAL, e.value, to_ticks(e.duration_s, config.tick_s)) for e in effects if e.kind in PERIODIC_KINDS)
         self.mod_att = ModifierManager()
         self.mod_def = ModifierManager()
 
@@ -49,7 +113,43 @@ class CombatSimulator:
         self.def_shield = self.defender_base.get("shield")
 
         self.total_damage = 0.0
-        self.breakdown = {"normal": 0.0, "skill": 0.0, "aoe_extra": 0.0}
+        self.breakdown = {"normal": 0.0, "skill": 0.0, "aoe_extra": 0.0, "dot": 0.0}
+        # Attacker sustain; does not change damage dealt
+        self.support = {"healing": 0.0, "shield_granted": 0.0}
+
+        self._skill_mult = float(attacker_hero.skill_factor) / 1000.0
+        # Damage coefficients cached per (mod_att.version, mod_def.version)
+        self._coef_key: Optional[Tuple[int, int]] = None
+        self._coef: Tuple[float, float, float, float, float, float] = (0.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+        self._attack_every = to_ticks(config.attack_interval_s, config.tick_s)
+        self._counter_every = to_ticks(config.counter_interval_s, config.tick_s)
+        self.timeline = Timeline()
+        self.timeline.schedule(0, EV_ATTACK)
+        if config.counter_enabled:
+            self.timeline.schedule(0, EV_COUNTER)
+        self._cast_pending = False
+
+        # Periodic effects are aggregated per channel: a summed rate (value per second), the
+        # rate-time integral since the last payout, and per-expiry-tick rate drops. Payouts run
+        # every periodic interval while anything is active, whatever the number of stacks.
+        self._per_every = to_ticks(config.periodic_interval_s, config.tick_s)
+        self._reset_periodic()
+
+        # Cycle detection: state signature after each cast -> (tick, totals at that tick)
+        self._detect_cycles = config.deterministic and config.extrapolate_cycles and recorder is None
+        self._cycle_seen: Dict[Any, Tuple[int, float, Tuple[float, ...]]] = {}
+
+    def _reset_periodic(self) -> None:
+        self._per_rate = [0.0, 0.0]
+        self._per_acc = [0.0, 0.0]
+        self._per_last = self.tick
+        self._per_expiry: Dict[int, List[float]] = {}
+        self._per_pending = False
+
+    @property
+    def time_s(self) -> float:
+        return self.tick * self.cfg.tick_s
 
     def _eff_att(self) -> Dict[str, float]:
         s = self.attacker_base.as_dict()
@@ -64,6 +164,43 @@ class CombatSimulator:
         s["shield"] = self.def_shield
         return s
 
+    def _coefficients(self) -> Tuple[float, float, float, float, float, float]:
+        """(normal hit, skill hit, crit chance, crit damage, dot per second, attack) for the current modifier state.
+
+        Normal/skill hits are pre-crit in Monte Carlo mode and expected-crit in deterministic mode;
+        damage over time never crits.
+        """
+        key = (self.mod_att.version, self.mod_def.version)
+        if key != self._coef_key:
+            att = self._eff_att()
+            coef = base = damage_coefficient(att, self._eff_def(), defense_constant=self.cfg.defense_constant)
+            crit_chance = float(att.get("crit_chance", 0.0))
+            crit_damage = float(att.get("crit_damage", 1.5))
+            if self.cfg.deterministic:
+                coef *= expected_crit_multiplier(crit_chance, crit_damage)
+            self._coef = (coef * 0.5, coef * self._skill_mult, crit_chance, crit_damage, base, float(att.get("attack", 0.0)))
+            self._coef_key = key
+        return self._coef
+
+    def _hit(self, dmg: float, crit_chance: float, crit_damage: float, skill: bool = False) -> float:
+        if not self.cfg.deterministic:
+            crit = roll_is_crit(crit_chance, self.rng) if self.crit_tilt is None else self._tilted_crit(crit_chance, self.crit_tilt[skill])
+            if crit:
+                dmg *= max(1.0, crit_damage)
+        return max(0.0, dmg)
+
+    def _tilted_crit(self, crit_chance: float, tilt: float) -> bool:
+        p = min(max(float(crit_chance), 0.0), 1.0)
+        if p <= 0.0 or p >= 1.0 or tilt == 0.0:
+            return roll_is_crit(p, self.rng)
+        odds = p / (1.0 - p) * math.exp(tilt)
+        q = odds / (1.0 + odds)
+        if self.rng.random() < q:
+            self.log_weight += math.log(p / q)
+            return True
+        self.log_weight += math.log((1.0 - p) / (1.0 - q))
+        return False
+
     def _apply_to_def(self, dmg: float) -> float:
         dmg = max(0.0, float(dmg))
         if self.def_shield > 0:
@@ -71,10 +208,13 @@ class CombatSimulator:
             self.def_shield -= absorbed
             dmg -= absorbed
         self.total_damage += dmg
+        if self.recorder is not None:
+            self.recorder.add_damage(self.tick, dmg)
         return dmg
 
     def _normal_attack(self) -> None:
-        dmg = calculate_damage(self._eff_att(), self._eff_def(), 0.5, defense_constant=self.cfg.defense_constant, deterministic=self.cfg.deterministic)
+        normal, _, cc, cd, _, _ = self._coefficients()
+        dmg = self._hit(normal, cc, cd)
         dealt = self._apply_to_def(dmg)
         self.breakdown["normal"] += dealt
         self.rage.gain(self.cfg.rage_on_normal)
@@ -83,8 +223,8 @@ class CombatSimulator:
         self.rage.gain(self.cfg.rage_on_counter)
 
     def _cast_skill(self) -> None:
-        mult = float(self.attacker_hero.skill_factor) / 1000.0
-        dmg_primary = calculate_damage(self._eff_att(), self._eff_def(), mult, defense_constant=self.cfg.defense_constant, deterministic=self.cfg.deterministic)
+        _, skill, cc, cd, _, _ = self._coefficients()
+        dmg_primary = self._hit(skill, cc, cd, True)
 
         if self.cfg.target_count <= 1:
             dealt = self._apply_to_def(dmg_primary)
@@ -99,37 +239,288 @@ class CombatSimulator:
         self.rage.cast()
 
         # Post-cast timed effects
-        for eff in (self.attacker_hero.skill_effects or []):
-            if eff.get("type") != "buff":
-                continue
-            target = eff.get("target", "attacker")
-            stat = eff.get("stat")
-            value = float(eff.get("value", 0.0))
-            duration = int(eff.get("duration_s", 0))
-            if not stat or duration <= 0:
-                continue
-            if target == "attacker":
-                self.mod_att.add(stat, value, duration)
+        mods = (self.mod_att, self.mod_def)
+        for target, stat, value, ticks in self.effects:
+            expires_at = mods[target].add(stat, value, ticks, self.tick)
+            self.timeline.schedule(expires_at, EV_EXPIRE, target)
+        for kind, value in self._instant:
+            if kind == EFFECT_RAGE:
+                self.rage.rage += value
             else:
-                self.mod_def.add(stat, value, duration)
+                self.support["shield_granted"] += value
+        if self._periodic:
+            self._start_periodic()
 
-    def step(self) -> None:
-        self._normal_attack()
-        if self.cfg.counter_enabled:
+    def _accrue(self) -> None:
+        dt = self.tick - self._per_last
+        if dt:
+            self._per_acc[_DOT] += self._per_rate[_DOT] * dt
+            self._per_acc[_HEAL] += self._per_rate[_HEAL] * dt
+            self._per_last = self.tick
+
+    def _start_periodic(self) -> None:
+        self._accrue()
+        for channel, value, ticks in self._periodic:
+            self._per_rate[channel] += value
+            expires_at = self.tick + ticks
+            drop = self._per_expiry.get(expires_at)
+            if drop is None:
+                drop = self._per_expiry[expires_at] = [0.0, 0.0]
+                self.timeline.schedule(expires_at, EV_EXPIRE, _PERIODIC_EXPIRY)
+            drop[channel] += value
+        if not self._per_pending:
+            self._per_pending = True
+            self.timeline.schedule((self.tick // self._per_every + 1) * self._per_every, EV_PERIODIC)
+
+    def _expire_periodic(self) -> None:
+        self._accrue()
+        drop = self._per_expiry.pop(self.tick)
+        if self._per_expiry:
+            self._per_rate[_DOT] -= drop[_DOT]
+            self._per_rate[_HEAL] -= drop[_HEAL]
+        else:
+            self._per_rate = [0.0, 0.0]  # exact zero, no float residue
+
+    def _periodic_tick(self) -> None:
+        self._accrue()
+        dot, heal = self._per_acc
+        self._per_acc = [0.0, 0.0]
+        _, _, _, _, base, atk = self._coefficients()
+        if dot:
+            self.breakdown["dot"] += self._apply_to_def(dot * self.cfg.tick_s * base)
+        if heal:
+            self.support["healing"] += heal * self.cfg.tick_s * atk
+        if self._per_rate[_DOT] or self._per_rate[_HEAL]:
+            self.timeline.schedule(self.tick + self._per_every, EV_PERIODIC)
+        else:
+            self._per_pending = False
+
+    def _queue_cast(self) -> None:
+        if not self._cast_pending and self.rage.can_cast():
+            self._cast_pending = True
+            self.timeline.schedule(self.tick, EV_CAST)
+
+    def _dispatch(self, kind: int, payload: Any) -> bool:
+        """Handle one event; returns True when it cast the skill."""
+        if kind == EV_ATTACK:
+            self._normal_attack()
+            self.timeline.schedule(self.tick + self._attack_every, EV_ATTACK)
+            self._queue_cast()
+        elif kind == EV_COUNTER:
             self._counter()
-        if self.rage.can_cast():
-            self._cast_skill()
-        self.mod_att.tick()
-        self.mod_def.tick()
-        self.time_s += 1
-
-    def run(self) -> Dict[str, Any]:
-        while self.time_s < self.cfg.duration_s:
-            self.step()
-        return {
-            "duration_s": self.cfg.duration_s,
+            self.timeline.schedule(self.tick + self._counter_every, EV_COUNTER)
+            self._queue_cast()
+        elif kind == EV_CAST:
+            self._cast_pending = False
+            if self.rage.can_cast():
+                self._cast_skill()
+                return True
+        elif kind == EV_EXPIRE:
+            if payload == _PERIODIC_EXPIRY:
+                self._expire_periodic()
+            else:
+                (self.mod_att, self.mod_def)[payload].expire(self.tick)
+        elif kind == EV_PERIODIC:
+            self._periodic_tick()
+        return False
+
+    def _cycle_signature(self) -> Optional[Tuple[Any, ...]]:
+        if self.def_shield > 0:
+            return None  # damage still depends on how much shield is left
+        return (
+            round(self.rage.rage, 9),
+            self._cast_pending,
+            self.mod_att.signature(self.tick),
+            self.mod_def.signature(self.tick),
+            self.timeline.signature(self.tick),
+            self._periodic_signature(),
+        )
+
+    def _periodic_signature(self) -> Tuple[Any, ...]:
+        if not self._per_pending:
+            return ()
+        return (
+            tuple(round(r, 9) for r in self._per_rate),
+            tuple(round(a, 9) for a in self._per_acc),
+            self._per_last - self.tick,
+            tuple(sorted((t - self.tick, round(d[0], 9), round(d[1], 9)) for t, d in self._per_expiry.items())),
+        )
+
+    def _extrapolate(self, end_tick: int) -> None:
+        """After a cast: if this exact state was seen before, skip whole cycles up to end_tick.
+
+        In deterministic mode the same state always produces the same future, so each
+        skipped cycle adds exactly the damage of the observed one.
+        """
+        sig = self._cycle_signature()
+        if sig is None:
+            return
+        breakdown = tuple(self.breakdown.values()) + tuple(self.support.values())
+        seen = self._cycle_seen.get(sig)
+        if seen is None:
+            self._cycle_seen[sig] = (self.tick, self.total_damage, breakdown)
+            return
+        start, total_then, breakdown_then = seen
+        period = self.tick - start
+        cycles = (end_tick - self.tick) // period if period > 0 else 0
+        if cycles <= 0:
+            return
+        shift = cycles * period
+        self.total_damage += cycles * (self.total_damage - total_then)
+        keys = [(self.breakdown, k) for k in self.breakdown] + [(self.support, k) for k in self.support]
+        for (d, key), now, then in zip(keys, breakdown, breakdown_then):
+            d[key] = now + cycles * (now - then)
+        self.tick += shift
+        self.timeline.shift(shift)
+        self.mod_att.shift(shift)
+        self.mod_def.shift(shift)
+        self._per_last += shift
+        self._per_expiry = {t + shift: d for t, d in self._per_expiry.items()}
+        self._cycle_seen.clear()
+
+    def advance_to(self, end_tick: int) -> None:
+        """Process every scheduled event before end_tick; cost scales with events, not ticks."""
+        tl = self.timeline
+        while tl and tl.peek_tick() < end_tick:
+            tick, kind, _, payload = tl.pop()
+            self.tick = tick
+            if self._dispatch(kind, payload) and self._detect_cycles:
+                self._extrapolate(end_tick)
+            if self.recorder is not None:
+                self.recorder.sample(tick, self.rage.rage, self.def_shield, len(self.mod_att) + len(self.mod_def))
+        self.tick = max(self.tick, end_tick)
+
+    def step(self) -> None:
+        self.advance_to(self.tick + 1)
+
+    def snapshot(self) -> SimSnapshot:
+        return SimSnapshot(
+            tick=self.tick,
+            rage=self.rage.rage,
+            def_shield=self.def_shield,
+            total_damage=self.total_damage,
+            breakdown=tuple(self.breakdown.items()),
+            mod_att=self.mod_att.state(),
+            mod_def=self.mod_def.state(),
+            timeline=self.timeline.state(),
+            cast_pending=self._cast_pending,
+            rng_state=self.rng.getstate(),
+            periodic=(tuple(self._per_rate), tuple(self._per_acc), self._per_last,
+                      tuple((t, tuple(d)) for t, d in self._per_expiry.items()), self._per_pending),
+            support=tuple(self.support.items()),
+            log_weight=self.log_weight,
+        )
+
+    def restore(self, snap: SimSnapshot) -> None:
+        self.tick = snap.tick
+        self.rage.rage = snap.rage
+        self.def_shield = snap.def_shield
+        self.total_damage = snap.total_damage
+        self.breakdown = dict(snap.breakdown)
+        self.mod_att.load_state(snap.mod_att)
+        self.mod_def.load_state(snap.mod_def)
+        self.timeline.load_state(snap.timeline)
+        self._cast_pending = snap.cast_pending
+        self.rng.setstate(snap.rng_state)
+        self._reset_periodic()
+        if snap.periodic is not None:
+            rate, acc, self._per_last, expiry, self._per_pending = snap.periodic
+            self._per_rate, self._per_acc = list(rate), list(acc)
+            self._per_expiry = {t: list(d) for t, d in expiry}
+        self.support = {"healing": 0.0, "shield_granted": 0.0, **dict(snap.support)}
+        self.log_weight = snap.log_weight
+        self._coef_key = None
+        self._cycle_seen.clear()
+
+    def checkpoint(self, at_s: float) -> SimSnapshot:
+        """Run up to at_s and snapshot there."""
+        self.advance_to(to_ticks(at_s, self.cfg.tick_s, minimum=0))
+        return self.snapshot()
+
+    def fork(
+        self,
+        snap: Optional[SimSnapshot] = None,
+        *,
+        config: Optional[SimConfig] = None,
+        attacker_bonuses: Optional[Dict[str, float]] = None,
+        defender_bonuses: Optional[Dict[str, float]] = None,
+        shield: Optional[float] = None,
+        rage: Optional[float] = None,
+    ) -> "CombatSimulator":
+        """New simulator resuming from `snap` (default: now) with altered parameters.
+
+        Bonuses are added to the base stats from the fork point on; `shield`/`rage`
+        replace the current values. The fork has its own RNG seeded with the
+        snapshot's state and no recorder.
+        """
+        snap = snap if snap is not None else self.snapshot()
+        cfg = config if config is not None else self.cfg
+        if cfg.tick_s != self.cfg.tick_s:
+            raise ValueError("a fork cannot change tick_s")
+
+        def bump(base: StatBlock, extra: Optional[Dict[str, float]]) -> StatBlock:
+            if not extra:
+                return base
+            s = dict(base.stats)
+            for k, v in extra.items():
+                s[k] = s.get(k, 0.0) + float(v)
+            return StatBlock(s)
+
+        sim = CombatSimulator.from_stats(
+            attacker_hero=self.attacker_hero,
+            attacker_stats=bump(self.attacker_base, attacker_bonuses),
+            defender_stats=bump(self.defender_base, defender_bonuses),
+            config=cfg,
+            rng=random.Random(),
+            crit_tilt=self.crit_tilt,
+        )
+        sim.restore(snap)
+        if cfg.counter_enabled != self.cfg.counter_enabled:
+            heap, seq = snap.timeline
+            events = [e for e in heap if e[1] != EV_COUNTER]
+            sim.timeline.load_state((tuple(sorted(events)), seq))
+            if cfg.counter_enabled:
+                sim.timeline.schedule(sim.tick, EV_COUNTER)
+        if shield is not None:
+            sim.def_shield = float(shield)
+        if rage is not None:
+            sim.rage.rage = float(rage)
+        return sim
+
+    def branch(self, snap: SimSnapshot, variants: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run one fork per variant (fork() keyword arguments) from a shared checkpoint."""
+        return [self.fork(snap, **kw).run() for kw in variants]
+
+    def _result(self, duration_s: float) -> Dict[str, Any]:
+        out = {
+            "duration_s": duration_s,
             "total_damage": self.total_damage,
-            "dps": self.total_damage / max(1, self.cfg.duration_s),
-            "breakdown": self.breakdown,
+            "dps": self.total_damage / max(1, duration_s),
+            "breakdown": dict(self.breakdown),
+            "support": dict(self.support),
             "final_rage": self.rage.rage,
         }
+        if self.crit_tilt is not None:
+            out["log_weight"] = self.log_weight
+        return out
+
+    def run(self, horizons: Optional[Iterable[float]] = None) -> Any:
+        """Run to cfg.duration_s and return the result dict.
+
+        With `horizons` (durations in seconds), run once to the longest one and return
+        a list of result dicts, one per horizon in ascending order, each identical to
+        what a separate run with that duration_s would report.
+        """
+        if horizons is None:
+            self.advance_to(to_ticks(self.cfg.duration_s, self.cfg.tick_s, minimum=0))
+            if self.recorder is not None:
+                self.recorder.finish()
+            return self._result(self.cfg.duration_s)
+
+        out: List[Dict[str, Any]] = []
+        for h in sorted(set(horizons)):
+            self.advance_to(to_ticks(h, self.cfg.tick_s, minimum=0))
+            out.append(self._result(h))
+        if self.recorder is not None:
+            self.recorder.finish()
+        return out
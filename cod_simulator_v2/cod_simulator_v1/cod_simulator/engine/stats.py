@@ -1,9 +1,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 from .models import Hero, Artifact, Pet, TalentNode, Build
 
-DEFAULTS: Dict[str, float] = {
+# Read-only: shared by every simulator (and thread)
+DEFAULTS: Mapping[str, float] = MappingProxyType({
     "attack": 0.0,
     "defense": 0.0,
     "health": 0.0,
@@ -14,7 +16,7 @@ DEFAULTS: Dict[str, float] = {
     "damage_reduction": 0.0,
     "rage_bonus": 0.0,
     "shield": 0.0,
-}
+})
 
 @dataclass
 class StatBlock:
@@ -65,3 +67,12 @@ def build_final_stats(hero: Hero, *, artifact: Optional[Artifact], pet: Optional
         s[stat] = s.get(stat, 0.0) + float(val)
 
     return StatBlock(s)
+
+def resolve_build_stats(hero: Hero, build: Build, *, artifacts: Dict[str, Artifact], pets: Dict[str, Pet], talent_nodes: Dict[str, TalentNode]) -> StatBlock:
+    return build_final_stats(
+        hero,
+        artifact=artifacts.get(build.artifact_id) if build.artifact_id else None,
+        pet=pets.get(build.pet_id) if build.pet_id else None,
+        talent_nodes=talent_nodes,
+        build=build,
+    )
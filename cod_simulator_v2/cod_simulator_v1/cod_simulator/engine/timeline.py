@@ -0,0 +1,50 @@
+from __future__ import annotations
+import heapq
+from typing import Any, List, Optional, Tuple
+
+# Event kinds double as the processing order for events sharing a tick:
+# expiries land before the attacks of that tick, casts after the rage gains,
+# periodic (DoT/heal) payouts last.
+EV_EXPIRE = 0
+EV_ATTACK = 1
+EV_COUNTER = 2
+EV_CAST = 3
+EV_PERIODIC = 4
+
+Event = Tuple[int, int, int, Any]  # tick, kind, seq, payload
+
+def to_ticks(seconds: float, tick_s: float, *, minimum: int = 1) -> int:
+    return max(minimum, int(round(float(seconds) / float(tick_s))))
+
+class Timeline:
+    """Priority queue of scheduled actions keyed by integer tick."""
+    def __init__(self) -> None:
+        self._heap: List[Event] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, tick: int, kind: int, payload: Any = None) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (int(tick), kind, self._seq, payload))
+
+    def peek_tick(self) -> Optional[int]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop(self) -> Event:
+        return heapq.heappop(self._heap)
+
+    def state(self) -> Tuple[Tuple[Event, ...], int]:
+        return tuple(self._heap), self._seq
+
+    def load_state(self, state: Tuple[Tuple[Event, ...], int]) -> None:
+        heap, self._seq = state
+        self._heap = list(heap)  # a sorted-by-heap-order copy is still a valid heap
+
+    def signature(self, now: int) -> Tuple[Tuple[int, int, Any], ...]:
+        """Pending events relative to `now` (order-independent, sequence numbers dropped)."""
+        return tuple(sorted((t - now, kind, payload) for t, kind, _, payload in self._heap))
+
+    def shift(self, ticks: int) -> None:
+        self._heap = [(t + ticks, kind, seq, payload) for t, kind, seq, payload in self._heap]
@@ -0,0 +1,185 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .models import Artifact, Build, Hero, Pet, SimConfig, TalentNode
+from .stats import StatBlock, resolve_build_stats
+from .simulation import CombatSimulator
+
+"""
+Legion layer: troops fighting on top of the hero-vs-hero simulator.
+
+Each side is a set of unit groups stored as parallel NumPy arrays (type, count,
+per-unit attack/defense/health, cumulative losses). Every step both sides hit
+each other simultaneously:
+
+- group i deals count_i * attack_i, scaled by its commander's all_damage_bonus
+  and expected crit, and by the type advantage against each enemy group;
+- damage is spread over enemy groups in proportion to their headcount and
+  reduced by unit defense (same curve as heroes) and the enemy commander's
+  damage_reduction;
+- losses = damage / unit health, so shrinking groups deal less next step.
+
+The commander's skill damage comes from a CombatSimulator of hero vs enemy
+hero, multiplied by `skill_scale` (troop-count scaling of skills) and by the
+fraction of troops still alive, then spread over enemy groups by headcount.
+The simulator already applies the enemy commander's defense, damage_reduction
+and debuffs, so skill damage skips the troop-side reductions.
+"""
+
+TROOP_TYPES = ("infantry", "cavalry", "marksman", "magic", "flying")
+TYPE_INDEX = {t: i for i, t in enumerate(TROOP_TYPES)}
+
+def default_advantage(bonus: float = 0.1) -> np.ndarray:
+    """adv[a, d]: damage multiplier of type a hitting type d (infantry > cavalry > marksman > infantry)."""
+    adv = np.ones((len(TROOP_TYPES), len(TROOP_TYPES)))
+    for a, d in (("infantry", "cavalry"), ("cavalry", "marksman"), ("marksman", "infantry")):
+        adv[TYPE_INDEX[a], TYPE_INDEX[d]] += bonus
+        adv[TYPE_INDEX[d], TYPE_INDEX[a]] -= bonus
+    return adv
+
+@dataclass
+class UnitGroups:
+    kind: np.ndarray      # int8 index into TROOP_TYPES
+    count: np.ndarray     # float64 survivors (fractional while fighting)
+    attack: np.ndarray    # per unit
+    defense: np.ndarray   # per unit
+    health: np.ndarray    # per unit
+    losses: np.ndarray    # cumulative
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "UnitGroups":
+        """[{"type": "infantry", "count": 20000, "attack": 30, "defense": 30, "health": 120}, ...]"""
+        n = len(records)
+        types = [str(r.get("type", "infantry")) for r in records]
+        for i, t in enumerate(types):
+            if t not in TYPE_INDEX:
+                raise ValueError(f"records[{i}]: unknown troop type {t!r}; expected one of {list(TYPE_INDEX)}")
+        kind = np.fromiter((TYPE_INDEX[t] for t in types), dtype=np.int8, count=n)
+
+        def col(key: str, default: float) -> np.ndarray:
+            return np.fromiter((float(r.get(key, default)) for r in records), dtype=np.float64, count=n)
+
+        return cls(kind=kind, count=col("count", 0.0), attack=col("attack", 0.0), defense=col("defense", 0.0),
+                   health=np.maximum(col("health", 1.0), 1e-9), losses=np.zeros(n))
+
+    def copy(self) -> "UnitGroups":
+        return replace(self, count=self.count.copy(), losses=self.losses.copy())
+
+    @property
+    def alive(self) -> float:
+        return float(self.count.sum())
+
+def _defense_factor(defense: np.ndarray, constant: float) -> np.ndarray:
+    d = np.maximum(defense, 0.0)
+    return 1.0 - d / (d + max(1e-6, float(constant)))
+
+def _crit_ev(stats: StatBlock) -> float:
+    c = min(max(stats.get("crit_chance"), 0.0), 1.0)
+    return (1.0 - c) + c * max(stats.get("crit_damage"), 1.0)
+
+class LegionBattle:
+    def __init__(
+        self,
+        *,
+        attacker_hero: Hero,
+        defender_hero: Hero,
+        attacker_stats: StatBlock,
+        defender_stats: StatBlock,
+        attacker_units: UnitGroups,
+        defender_units: UnitGroups,
+        config: SimConfig,
+        advantage: Optional[np.ndarray] = None,
+        skill_scale: float = 1.0,
+    ) -> None:
+        self.cfg = config
+        self.skill_scale = float(skill_scale)
+        self.step_s = float(config.attack_interval_s)
+        self.adv = advantage if advantage is not None else default_advantage()
+        self.units = (attacker_units.copy(), defender_units.copy())
+        self.initial = (max(attacker_units.alive, 1e-9), max(defender_units.alive, 1e-9))
+        self.stats = (attacker_stats, defender_stats)
+        # Commander skills: each hero attacks the other commander (deterministic EV crits).
+        hero_cfg = replace(config, deterministic=True, extrapolate_cycles=False)
+        self.commanders = (
+            CombatSimulator.from_stats(attacker_hero=attacker_hero, attacker_stats=attacker_stats, defender_stats=defender_stats, config=hero_cfg),
+            CombatSimulator.from_stats(attacker_hero=defender_hero, attacker_stats=defender_stats, defender_stats=attacker_stats, config=hero_cfg),
+        )
+        self._skill_seen = [0.0, 0.0]
+        self.damage_dealt = [0.0, 0.0]
+        self.time_s = 0.0
+
+    @classmethod
+    def from_builds(
+        cls,
+        *,
+        attacker_hero: Hero,
+        defender_hero: Hero,
+        attacker_build: Build,
+        defender_build: Build,
+        artifacts: Dict[str, Artifact],
+        pets: Dict[str, Pet],
+        talent_nodes: Dict[str, TalentNode],
+        attacker_units: UnitGroups,
+        defender_units: UnitGroups,
+        config: SimConfig,
+        **kwargs: Any,
+    ) -> "LegionBattle":
+        res = dict(artifacts=artifacts, pets=pets, talent_nodes=talent_nodes)
+        return cls(
+            attacker_hero=attacker_hero, defender_hero=defender_hero,
+            attacker_stats=resolve_build_stats(attacker_hero, attacker_build, **res),
+            defender_stats=resolve_build_stats(defender_hero, defender_build, **res),
+            attacker_units=attacker_units, defender_units=defender_units, config=config, **kwargs,
+        )
+
+    def _skill_damage(self, side: int) -> float:
+        sim = self.commanders[side]
+        sim.advance_to(sim.tick + max(1, round(self.step_s / sim.cfg.tick_s)))
+        total = sim.breakdown["skill"] + sim.breakdown["aoe_extra"] + sim.breakdown["dot"]
+        new = total - self._skill_seen[side]
+        self._skill_seen[side] = total
+        return new * self.skill_scale * (self.units[side].alive / self.initial[side])
+
+    def _incoming(self, side: int) -> np.ndarray:
+        """Damage each enemy group takes from `side` this step."""
+        src, dst = self.units[side], self.units[1 - side]
+        s_stats, d_stats = self.stats[side], self.stats[1 - side]
+        alive = dst.count.sum()
+        if alive <= 0:
+            return np.zeros_like(dst.count)
+        share = dst.count / alive
+        raw = src.count * src.attack * self.step_s
+        raw *= (1.0 + s_stats.get("all_damage_bonus")) * _crit_ev(s_stats)
+        per_target = raw @ self.adv[np.ix_(src.kind, dst.kind)]   # (n_dst,)
+        dmg = per_target * share
+        dmg *= _defense_factor(dst.defense, self.cfg.defense_constant)
+        dmg *= 1.0 - min(max(d_stats.get("damage_reduction"), 0.0), 0.95)
+        # Already mitigated by the enemy commander inside the simulator
+        return dmg + self._skill_damage(side) * share
+
+    def step(self) -> None:
+        # Both sides strike from the same starting state.
+        hits = (self._incoming(0), self._incoming(1))   # hits[s] lands on side 1-s
+        for side in (0, 1):
+            dst = self.units[1 - side]
+            lost = np.minimum(dst.count, hits[side] / dst.health)
+            dst.count -= lost
+            dst.losses += lost
+            self.damage_dealt[side] += float((lost * dst.health).sum())
+        self.time_s += self.step_s
+
+    def run(self) -> Dict[str, Any]:
+        while self.time_s < self.cfg.duration_s and self.units[0].alive > 0 and self.units[1].alive > 0:
+            self.step()
+        att, dfn = self.units
+        if att.alive > 0 and dfn.alive > 0:
+            winner = None
+        else:
+            winner = "attacker" if att.alive > 0 else ("defender" if dfn.alive > 0 else None)
+        return {
+            "duration_s": self.time_s,
+            "winner": winner,
+            "attacker": {"alive": att.alive, "losses": float(att.losses.sum()), "damage_dealt": self.damage_dealt[0], "groups_alive": att.count.tolist()},
+            "defender": {"alive": dfn.alive, "losses": float(dfn.losses.sum()), "damage_dealt": self.damage_dealt[1], "groups_alive": dfn.count.tolist()},
+        }
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+from .json_loader import load_heroes, load_artifacts, load_pets, load_talents
+
+"""
+Catalog hot-reload.
+
+CatalogManager owns the in-memory catalogs (heroes/artifacts/pets/talents) for a
+data directory. refresh() re-parses only files whose content changed, diffs the
+entities by id and updates the existing dicts in place, so anything holding a
+reference (UI, editors, simulators being built) sees the new data. Listeners get
+one CatalogChange per changed file naming exactly which ids were touched.
+
+Worker threads should not read the live dicts while a refresh may run; they take
+snapshot(), a read-only view frozen at one point in time.
+"""
+
+SOURCES: Dict[str, Tuple[str, Callable[[Path], Dict[str, Any]]]] = {
+    "heroes": ("heroes.json", load_heroes),
+    "artifacts": ("artifacts.json", load_artifacts),
+    "pets": ("pets.json", load_pets),
+    "talents": ("talents.json", load_talents),
+}
+
+@dataclass(frozen=True)
+class CatalogChange:
+    kind: str   # "heroes" | "artifacts" | "pets" | "talents"
+    added: FrozenSet[str]
+    removed: FrozenSet[str]
+    changed: FrozenSet[str]
+
+    @property
+    def affected(self) -> FrozenSet[str]:
+        return self.added | self.removed | self.changed
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    heroes: Mapping[str, Any]
+    artifacts: Mapping[str, Any]
+    pets: Mapping[str, Any]
+    talents: Mapping[str, Any]
+
+def freeze_catalog(catalog: Dict[str, Any]) -> Mapping[str, Any]:
+    """Read-only copy of a catalog dict (entities are frozen dataclasses already)."""
+    return MappingProxyType(dict(catalog))
+
+def catalog_hash(heroes: Mapping[str, Any], artifacts: Mapping[str, Any], pets: Mapping[str, Any], talents: Mapping[str, Any]) -> str:
+    """Content hash of parsed catalogs: equal whenever two copies simulate the same (file formatting and order don't matter)."""
+    doc = {kind: {k: asdict(v) for k, v in cat.items()} for kind, cat in
+           (("heroes", heroes), ("artifacts", artifacts), ("pets", pets), ("talents", talents))}
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def diff_entities(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    added = frozenset(k for k in new if k not in old)
+    removed = frozenset(k for k in old if k not in new)
+    changed = frozenset(k for k in new if k in old and old[k] != new[k])
+    return added, removed, changed
+
+class CatalogManager:
+    def __init__(self, data_dir: str | Path) -> None:
+        self.data_dir = Path(data_dir)
+        self.heroes: Dict[str, Any] = {}
+        self.artifacts: Dict[str, Any] = {}
+        self.pets: Dict[str, Any] = {}
+        self.talents: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}  # kind -> last load error (old data kept)
+        self._stat: Dict[str, Tuple[int, int]] = {}  # kind -> (mtime_ns, size)
+        self._digest: Dict[str, str] = {}
+        self._listeners: List[Callable[[CatalogChange], None]] = []
+        self._lock = threading.Lock()
+        # The first load raises on malformed files; later refreshes keep the last good data.
+        self._loaded = False
+        self.refresh()
+        self._loaded = True
+
+    def catalog(self, kind: str) -> Dict[str, Any]:
+        return getattr(self, kind)
+
+    def snapshot(self) -> CatalogSnapshot:
+        with self._lock:
+            return CatalogSnapshot(**{kind: freeze_catalog(self.catalog(kind)) for kind in SOURCES})
+
+    def subscribe(self, fn: Callable[[CatalogChange], None]) -> Callable[[], None]:
+        self._listeners.append(fn)
+        return lambda: self._listeners.remove(fn) if fn in self._listeners else None
+
+    def refresh(self, *, force: bool = False) -> List[CatalogChange]:
+        """Reload changed files; returns (and broadcasts) the resulting changes."""
+        changes: List[CatalogChange] = []
+        with self._lock:
+            for kind, (fname, loader) in SOURCES.items():
+                change = self._refresh_one(kind, self.data_dir/fname, loader, force)
+                if change is not None:
+                    changes.append(change)
+        for change in changes:
+            for fn in list(self._listeners):
+                fn(change)
+        return changes
+
+    def _refresh_one(self, kind: str, path: Path, loader, force: bool) -> Optional[CatalogChange]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        if not force and self._stat.get(kind) == key:
+            return None
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if not force and self._digest.get(kind) == digest:
+            self._stat[kind] = key  # touched, not changed
+            return None
+        try:
+            new = loader(path)
+        except Exception as e:
+            self.errors[kind] = str(e)
+            if not self._loaded:
+                raise
+            # Half-written or malformed file: keep serving the old catalog, retry next poll.
+            return None
+        self.errors.pop(kind, None)
+        self._stat[kind] = key
+        self._digest[kind] = digest
+
+        cur = self.catalog(kind)
+        added, removed, changed = diff_entities(cur, new)
+        if not (added or removed or changed):
+            return None
+        for k in removed:
+            del cur[k]
+        for k in added | changed:
+            cur[k] = new[k]
+        # Keep file order for dropdowns etc.
+        if added or removed:
+            ordered = {k: cur[k] for k in new}
+            cur.clear()
+            cur.update(ordered)
+        return CatalogChange(kind=kind, added=added, removed=removed, changed=changed)
+
+    def watch(self, stop: threading.Event, interval_s: float = 1.0) -> None:
+        """Poll the data directory until `stop` is set (run in a background thread)."""
+        while not stop.wait(interval_s):
+            self.refresh()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .json_loader import _load_json
+from ..engine.stats import DEFAULTS
+
+"""
+Columnar (struct-of-arrays) catalog views for bulk evaluation.
+
+Built straight from the same JSON files as json_loader, without creating one
+dataclass + stats dict per entity. Every stat is a float64 column indexed by
+row; `index` maps entity id -> row and `ids` maps row -> id.
+
+Hero columns hold final base values (DEFAULTS filled in); artifact and pet
+columns hold additive bonuses (0.0 where an entity has no such bonus).
+"""
+
+@dataclass
+class ColumnarTable:
+    ids: List[str]
+    index: Dict[str, int]
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    defaults: Dict[str, float] = field(default_factory=dict)
+    # Hero tables only
+    rage_cost: Optional[np.ndarray] = None
+    skill_factor: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, entity_id: str) -> int:
+        return self.index[entity_id]
+
+    def rows(self, entity_ids: Iterable[Optional[str]]) -> np.ndarray:
+        """Row index per id; -1 for None/unknown ids."""
+        return np.fromiter((self.index.get(e, -1) if e is not None else -1 for e in entity_ids), dtype=np.int64)
+
+    def column(self, stat: str) -> np.ndarray:
+        col = self.columns.get(stat)
+        if col is None:
+            return np.full(len(self.ids), self.defaults.get(stat, 0.0))
+        return col
+
+    def value(self, entity_id: str, stat: str) -> float:
+        col = self.columns.get(stat)
+        return float(col[self.index[entity_id]]) if col is not None else self.defaults.get(stat, 0.0)
+
+    def gather(self, stat: str, rows: np.ndarray) -> np.ndarray:
+        """Column values at `rows`; rows of -1 contribute 0.0 (no entity)."""
+        col = self.columns.get(stat)
+        if col is None:
+            return np.zeros(len(rows))
+        return np.where(rows >= 0, col[np.maximum(rows, 0)], 0.0)
+
+def _build(records: List[Dict[str, Any]], stats_of: Callable[[Dict[str, Any]], Iterable[Tuple[str, Any]]], defaults: Dict[str, float]) -> ColumnarTable:
+    ids = [str(r.get("id")) for r in records]
+    index = {eid: i for i, eid in enumerate(ids)}
+    n = len(ids)
+    columns: Dict[str, np.ndarray] = {stat: np.full(n, v) for stat, v in defaults.items()}
+    for i, r in enumerate(records):
+        for stat, val in stats_of(r):
+            col = columns.get(stat)
+            if col is None:
+                col = columns[stat] = np.zeros(n)
+            col[i] += float(val)
+    return ColumnarTable(ids=ids, index=index, columns=columns, defaults=dict(defaults))
+
+def _hero_stats(h: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    # base_stats replace DEFAULTS (see build_final_stats): emit the delta from the default
+    for stat, val in (h.get("base_stats", {}) or {}).items():
+        yield stat, float(val) - DEFAULTS.get(stat, 0.0)
+
+def _artifact_stats(a: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    ms = a.get("main_stat", {}) or {}
+    if ms.get("stat"):
+        yield ms["stat"], float(ms.get("value", 0.0))
+    yield from (a.get("secondary_stats", {}) or {}).items()
+
+def _pet_stats(p: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    return (p.get("bonuses", {}) or {}).items()
+
+def columnar_heroes(path: str | Path) -> ColumnarTable:
+    records = _load_json(path).get("heroes", [])
+    table = _build(records, _hero_stats, DEFAULTS)
+    n = len(records)
+    table.rage_cost = np.fromiter((int(h.get("rage_cost", 1000)) for h in records), dtype=np.int64, count=n)
+    table.skill_factor = np.fromiter((float(h.get("skill_factor", 0.0)) for h in records), dtype=np.float64, count=n)
+    return table
+
+def columnar_artifacts(path: str | Path) -> ColumnarTable:
+    return _build(_load_json(path).get("artifacts", []), _artifact_stats, {})
+
+def columnar_pets(path: str | Path) -> ColumnarTable:
+    return _build(_load_json(path).get("pets", []), _pet_stats, {})
+
+def bulk_final_stats(
+    heroes: ColumnarTable,
+    *,
+    artifacts: Optional[ColumnarTable] = None,
+    artifact_rows: Optional[np.ndarray] = None,
+    pets: Optional[ColumnarTable] = None,
+    pet_rows: Optional[np.ndarray] = None,
+    bonuses: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """Final stats of every hero at once (vectorized build_final_stats).
+
+    `artifact_rows` / `pet_rows` give the equipped entity row per hero (-1 = none);
+    a scalar row equips the same entity on every hero. `bonuses` (talent or extra
+    bonuses) are added uniformly.
+    """
+    n = len(heroes)
+    out = {stat: col.copy() for stat, col in heroes.columns.items()}
+
+    def add(stat: str, values) -> None:
+        if stat not in out:
+            out[stat] = np.zeros(n)
+        out[stat] += values
+
+    for table, rows in ((pets, pet_rows), (artifacts, artifact_rows)):
+        if table is None or rows is None:
+            continue
+        rows = np.broadcast_to(np.asarray(rows, dtype=np.int64), (n,))
+        for stat in table.columns:
+            add(stat, table.gather(stat, rows))
+    for stat, val in (bonuses or {}).items():
+        add(stat, float(val))
+    return out
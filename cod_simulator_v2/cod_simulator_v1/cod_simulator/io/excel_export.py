@@ -1,7 +1,10 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import json
+import os
 import pandas as pd
 
 """
@@ -59,127 +62,137 @@ COL_PET_ATK_BONUS = "Attack Bonus"
 COL_PET_DEF_BONUS = "Defense Bonus"
 COL_PET_HP_BONUS = "Health Bonus"
 
-def _safe(v, default=None):
-    if v is None:
-        return default
-    try:
-        if pd.isna(v):
-            return default
-    except Exception:
-        pass
-    return v
-
 def _read(excel_path: Path, sheet: str) -> pd.DataFrame:
     return pd.read_excel(excel_path, sheet_name=sheet)
 
-def export_v1_json(excel_path: str | Path, out_dir: str | Path) -> Dict[str, Path]:
-    excel_path = Path(excel_path)
-    out_dir = Path(out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    heroes: List[Dict[str, Any]] = []
-    talents: List[Dict[str, Any]] = []
-    artifacts: List[Dict[str, Any]] = []
-    pets: List[Dict[str, Any]] = []
-
-    # Heroes
+# Column helpers: a missing column behaves like an all-empty one.
+def _col(df: pd.DataFrame, col: str) -> pd.Series:
+    return df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+def _num(df: pd.DataFrame, col: str, default: float) -> pd.Series:
+    v = pd.to_numeric(_col(df, col), errors="coerce").fillna(default)
+    return v.where(v != 0, default).astype(float)  # 0 counts as empty (matches `x or default`)
+
+def _text(df: pd.DataFrame, col: str, default: str) -> pd.Series:
+    v = _col(df, col)
+    return v.where(v.notna() & (v.astype(str) != ""), default).astype(str)
+
+def _ids(df: pd.DataFrame, col: str) -> pd.Series:
+    return _col(df, col).astype(str)
+
+def _required(df: pd.DataFrame, *cols: str) -> pd.DataFrame:
+    mask = pd.Series(True, index=df.index)
+    for c in cols:
+        mask &= _col(df, c).notna()
+    return df[mask]
+
+def _records(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    # zip of plain lists is much faster than DataFrame.to_dict(orient="records")
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+def _heroes(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    df = _required(df, COL_HERO_ID, COL_HERO_NAME)
+    stats = zip(_num(df, COL_HERO_ATK, 0).tolist(), _num(df, COL_HERO_DEF, 0).tolist(), _num(df, COL_HERO_HP, 0).tolist())
+    return [
+        {"id": hid, "name": name, "rarity": rarity, "rage_cost": rage,
+         "base_stats": {"attack": atk, "defense": dfn, "health": hp},
+         "skill_factor": sf, "skill_effects": []}
+        for hid, name, rarity, rage, (atk, dfn, hp), sf in zip(
+            _ids(df, COL_HERO_ID).tolist(),
+            _col(df, COL_HERO_NAME).astype(str).tolist(),
+            _text(df, COL_HERO_RARITY, "Unknown").tolist(),
+            _num(df, COL_HERO_RAGE_COST, 1000).astype(int).tolist(),
+            stats,
+            _num(df, COL_HERO_SKILL_FACTOR, 0).tolist(),
+        )
+    ]
+
+def _talents(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    df = _required(df, COL_TALENT_ID, COL_TALENT_STAT)
+    split = _text(df, COL_TALENT_PREREQ, "").str.split(",")
+    return _records({
+        "id": _ids(df, COL_TALENT_ID).tolist(),
+        "stat": _col(df, COL_TALENT_STAT).astype(str).tolist(),
+        "value_per_rank": _num(df, COL_TALENT_VALUE_PER_RANK, 0).tolist(),
+        "max_rank": _num(df, COL_TALENT_MAX_RANK, 1).astype(int).tolist(),
+        "name": _text(df, COL_TALENT_NAME, "").tolist(),
+        "description": _text(df, COL_TALENT_DESC, "").tolist(),
+        "tree": _text(df, COL_TALENT_TREE, "General").tolist(),
+        "x": _num(df, COL_TALENT_X, 0).tolist(),
+        "y": _num(df, COL_TALENT_Y, 0).tolist(),
+        "prereq": [[p.strip() for p in parts if p.strip()] for parts in split.tolist()],
+    })
+
+def _artifacts(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    df = _required(df, COL_ART_ID, COL_ART_NAME, COL_ART_MAIN_STAT)
+    return [
+        {"id": aid, "name": name, "rarity": rarity,
+         "main_stat": {"stat": ms, "value": val}, "secondary_stats": {}}
+        for aid, name, rarity, ms, val in zip(
+            _ids(df, COL_ART_ID).tolist(),
+            _col(df, COL_ART_NAME).astype(str).tolist(),
+            _text(df, COL_ART_RARITY, "Unknown").tolist(),
+            _col(df, COL_ART_MAIN_STAT).astype(str).tolist(),
+            _num(df, COL_ART_MAIN_VALUE, 0).tolist(),
+        )
+    ]
+
+def _pets(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    df = _required(df, COL_PET_ID, COL_PET_NAME)
+    bonus_cols = [(stat, pd.to_numeric(_col(df, col), errors="coerce").tolist())
+                  for col, stat in [(COL_PET_ATK_BONUS, "attack"), (COL_PET_DEF_BONUS, "defense"), (COL_PET_HP_BONUS, "health")]]
+    stats = [stat for stat, _ in bonus_cols]
+    bonuses = [{stat: float(v) for stat, v in zip(stats, vals) if v == v}  # NaN != NaN
+               for vals in zip(*(values for _, values in bonus_cols))]
+    return [
+        {"id": pid, "name": name, "rarity": rarity, "bonuses": b}
+        for pid, name, rarity, b in zip(
+            _ids(df, COL_PET_ID).tolist(),
+            _col(df, COL_PET_NAME).astype(str).tolist(),
+            _text(df, COL_PET_RARITY, "Unknown").tolist(),
+            bonuses,
+        )
+    ]
+
+SHEETS = {
+    "heroes": (SHEET_HERO, _heroes),
+    "talents": (SHEET_TALENT_NODE, _talents),
+    "artifacts": (SHEET_ARTIFACTS, _artifacts),
+    "pets": (SHEET_PETS, _pets),
+}
+
+def _export_sheet(excel_path: Path, key: str) -> List[Dict[str, Any]]:
+    sheet, parse = SHEETS[key]
     try:
-        df = _read(excel_path, SHEET_HERO)
-        for r in df.where(pd.notnull(df), None).to_dict(orient="records"):
-            hid = _safe(r.get(COL_HERO_ID))
-            name = _safe(r.get(COL_HERO_NAME))
-            if hid is None or name is None:
-                continue
-            heroes.append({
-                "id": str(hid),
-                "name": str(name),
-                "rarity": str(_safe(r.get(COL_HERO_RARITY), "Unknown")),
-                "rage_cost": int(_safe(r.get(COL_HERO_RAGE_COST), 1000) or 1000),
-                "base_stats": {
-                    "attack": float(_safe(r.get(COL_HERO_ATK), 0) or 0),
-                    "defense": float(_safe(r.get(COL_HERO_DEF), 0) or 0),
-                    "health": float(_safe(r.get(COL_HERO_HP), 0) or 0),
-                },
-                "skill_factor": float(_safe(r.get(COL_HERO_SKILL_FACTOR), 0) or 0),
-                "skill_effects": []
-            })
+        return parse(_read(excel_path, sheet))
     except Exception:
-        pass
+        # Missing sheet / unexpected layout: export an empty list, like the other sheets
+        return []
 
-    # Talents (+ UI fields)
-    try:
-        df = _read(excel_path, SHEET_TALENT_NODE)
-        for r in df.where(pd.notnull(df), None).to_dict(orient="records"):
-            tid = _safe(r.get(COL_TALENT_ID))
-            stat = _safe(r.get(COL_TALENT_STAT))
-            if tid is None or stat is None:
-                continue
-            prereq_raw = str(_safe(r.get(COL_TALENT_PREREQ), "") or "")
-            prereq = [p.strip() for p in prereq_raw.split(",") if p.strip()]
-            talents.append({
-                "id": str(tid),
-                "stat": str(stat),
-                "value_per_rank": float(_safe(r.get(COL_TALENT_VALUE_PER_RANK), 0) or 0),
-                "max_rank": int(_safe(r.get(COL_TALENT_MAX_RANK), 1) or 1),
-                "name": str(_safe(r.get(COL_TALENT_NAME), "") or ""),
-                "description": str(_safe(r.get(COL_TALENT_DESC), "") or ""),
-                "tree": str(_safe(r.get(COL_TALENT_TREE), "General") or "General"),
-                "x": float(_safe(r.get(COL_TALENT_X), 0) or 0),
-                "y": float(_safe(r.get(COL_TALENT_Y), 0) or 0),
-                "prereq": prereq,
-            })
-    except Exception:
-        pass
+def export_v1_json(excel_path: str | Path, out_dir: str | Path, *, workers: Optional[int] = None) -> Dict[str, Path]:
+    """Export the four sheets to JSON; sheets are parsed concurrently in a process pool.
 
-    # Artifacts
-    try:
-        df = _read(excel_path, SHEET_ARTIFACTS)
-        for r in df.where(pd.notnull(df), None).to_dict(orient="records"):
-            aid = _safe(r.get(COL_ART_ID))
-            name = _safe(r.get(COL_ART_NAME))
-            ms = _safe(r.get(COL_ART_MAIN_STAT))
-            if aid is None or name is None or ms is None:
-                continue
-            artifacts.append({
-                "id": str(aid),
-                "name": str(name),
-                "rarity": str(_safe(r.get(COL_ART_RARITY), "Unknown")),
-                "main_stat": {"stat": str(ms), "value": float(_safe(r.get(COL_ART_MAIN_VALUE), 0) or 0)},
-                "secondary_stats": {}
-            })
-    except Exception:
-        pass
+    workers=1 parses in-process (one sheet after another).
+    """
+    excel_path = Path(excel_path)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Pets
-    try:
-        df = _read(excel_path, SHEET_PETS)
-        for r in df.where(pd.notnull(df), None).to_dict(orient="records"):
-            pid = _safe(r.get(COL_PET_ID))
-            name = _safe(r.get(COL_PET_NAME))
-            if pid is None or name is None:
-                continue
-            bonuses: Dict[str, float] = {}
-            for col, stat in [(COL_PET_ATK_BONUS,"attack"),(COL_PET_DEF_BONUS,"defense"),(COL_PET_HP_BONUS,"health")]:
-                v = _safe(r.get(col))
-                if v is not None:
-                    bonuses[stat] = bonuses.get(stat, 0.0) + float(v or 0)
-            pets.append({
-                "id": str(pid),
-                "name": str(name),
-                "rarity": str(_safe(r.get(COL_PET_RARITY), "Unknown")),
-                "bonuses": bonuses
-            })
-    except Exception:
-        pass
-
-    paths = {
-        "heroes": out_dir/"heroes.json",
-        "talents": out_dir/"talents.json",
-        "artifacts": out_dir/"artifacts.json",
-        "pets": out_dir/"pets.json",
-    }
-    paths["heroes"].write_text(json.dumps({"heroes": heroes}, indent=2), encoding="utf-8")
-    paths["talents"].write_text(json.dumps({"talents": talents}, indent=2), encoding="utf-8")
-    paths["artifacts"].write_text(json.dumps({"artifacts": artifacts}, indent=2), encoding="utf-8")
-    paths["pets"].write_text(json.dumps({"pets": pets}, indent=2), encoding="utf-8")
+    keys = list(SHEETS)
+    workers = min(len(keys), workers if workers is not None else (os.cpu_count() or 1))
+    records: Dict[str, List[Dict[str, Any]]] = {}
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                records = dict(zip(keys, pool.map(_export_sheet, [excel_path] * len(keys), keys)))
+        except (OSError, BrokenProcessPool):
+            records = {}
+    for key in keys:
+        if key not in records:
+            records[key] = _export_sheet(excel_path, key)
+
+    paths = {key: out_dir/f"{key}.json" for key in ("heroes", "talents", "artifacts", "pets")}
+    for key, path in paths.items():
+        path.write_text(json.dumps({key: records[key]}, indent=2), encoding="utf-8")
     return paths
@@ -2,7 +2,8 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from typing import Any, Dict
-from ..engine.models import Hero, Artifact, Pet, TalentNode
+from ..engine.models import Hero, Artifact, Pet, TalentNode, Build
+from ..engine.effects import SkillEffectError, compile_skill_effects
 
 def _load_json(path: str | Path) -> Any:
     p = Path(path)
@@ -11,8 +12,15 @@ def _load_json(path: str | Path) -> Any:
 def load_heroes(path: str | Path) -> Dict[str, Hero]:
     data = _load_json(path)
     out: Dict[str, Hero] = {}
+    errors = []
     for h in data.get("heroes", []):
         hid = str(h.get("id"))
+        effects = h.get("skill_effects", []) or []
+        try:
+            compiled = compile_skill_effects(hid, effects)
+        except SkillEffectError as e:
+            errors.append(str(e))
+            continue
         out[hid] = Hero(
             id=hid,
             name=h.get("name", hid),
@@ -20,8 +28,11 @@ def load_heroes(path: str | Path) -> Dict[str, Hero]:
             rage_cost=int(h.get("rage_cost", 1000)),
             base_stats=h.get("base_stats", {}) or {},
             skill_factor=float(h.get("skill_factor", 0.0)),
-            skill_effects=h.get("skill_effects", []) or [],
+            skill_effects=effects,
+            compiled_effects=compiled,
         )
+    if errors:
+        raise SkillEffectError(f"{path}: malformed skill effects:\n" + "\n".join(errors))
     return out
 
 def load_artifacts(path: str | Path) -> Dict[str, Artifact]:
@@ -69,3 +80,21 @@ def load_talents(path: str | Path) -> Dict[str, TalentNode]:
             prereq=list(t.get("prereq", []) or []),
         )
     return out
+
+def load_builds(path: str | Path) -> Dict[str, Build]:
+    """Reference builds keyed by hero id: {"builds": [{"hero_id": ..., "artifact_id": ..., ...}]}"""
+    data = _load_json(path)
+    out: Dict[str, Build] = {}
+    for b in data.get("builds", []):
+        build = parse_build(b)
+        out[build.hero_id] = build
+    return out
+
+def parse_build(b: Dict[str, Any]) -> Build:
+    return Build(
+        hero_id=str(b.get("hero_id")),
+        artifact_id=b.get("artifact_id") or None,
+        pet_id=b.get("pet_id") or None,
+        selected_talents={str(k): int(v) for k, v in (b.get("selected_talents", {}) or {}).items()},
+        extra_bonuses={str(k): float(v) for k, v in (b.get("extra_bonuses", {}) or {}).items()},
+    )
@@ -0,0 +1,243 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import zlib
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, get_type_hints
+import numpy as np
+from ..engine.models import Build, SimConfig
+
+"""
+Append-only columnar store for simulation results.
+
+A store is a directory holding manifest.json plus one file per (chunk, column).
+Rows are buffered and written CHUNK_ROWS at a time. String columns (hero ids,
+build hashes) are dictionary-encoded as int32 codes; the dictionaries live in
+the manifest. With compression="zlib" each chunk file is a zlib-compressed raw
+array; with compression=None it is a .npy file that queries memory-map.
+
+Queries (scan/aggregate) read only the columns they touch, one chunk at a time,
+so memory stays bounded by the chunk size whatever the number of rows.
+"""
+
+CHUNK_ROWS = 65536
+MANIFEST = "manifest.json"
+
+def _config_schema() -> Dict[str, str]:
+    # From the annotations, not the defaults (rage_on_normal = 94 is a float field). Every numeric field is
+    # stored as float64: duration_s holds fractional horizons and calibrated constants are not whole numbers.
+    hints = get_type_hints(SimConfig)
+    return {f"cfg_{f.name}": "bool" if hints[f.name] is bool else "float64" for f in fields(SimConfig)}
+
+RESULT_SCHEMA: Dict[str, str] = {
+    "attacker_id": "str",
+    "defender_id": "str",
+    "attacker_build": "str",
+    "defender_build": "str",
+    **_config_schema(),
+    "total_damage": "float64",
+    "dps": "float64",
+    "normal": "float64",
+    "skill": "float64",
+    "aoe_extra": "float64",
+    "dot": "float64",
+    "final_rage": "float64",
+}
+
+def build_hash(build: Optional[Build]) -> str:
+    """Stable short id of a build (talents/bonuses included); "" for no build."""
+    if build is None:
+        return ""
+    raw = json.dumps(asdict(build), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def result_row(
+    result: Dict[str, Any],
+    *,
+    attacker_id: str,
+    defender_id: str,
+    config: SimConfig,
+    attacker_build: Optional[Build] = None,
+    defender_build: Optional[Build] = None,
+) -> Dict[str, Any]:
+    """Flatten one CombatSimulator.run() result plus its inputs into a RESULT_SCHEMA row."""
+    row: Dict[str, Any] = {
+        "attacker_id": attacker_id,
+        "defender_id": defender_id,
+        "attacker_build": build_hash(attacker_build),
+        "defender_build": build_hash(defender_build),
+    }
+    row.update({f"cfg_{k}": v for k, v in asdict(config).items()})
+    row["cfg_duration_s"] = result.get("duration_s", config.duration_s)
+    breakdown = result.get("breakdown", {})
+    row.update(total_damage=result["total_damage"], dps=result["dps"], final_rage=result.get("final_rage", 0.0),
+               normal=breakdown.get("normal", 0.0), skill=breakdown.get("skill", 0.0), aoe_extra=breakdown.get("aoe_extra", 0.0), dot=breakdown.get("dot", 0.0))
+    return row
+
+_OPS = {
+    "==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+}
+
+Where = Sequence[Tuple[str, str, Any]]  # [(column, op, value)], op in _OPS or "in"
+
+class ResultStore:
+    def __init__(self, path: str | Path, *, schema: Optional[Dict[str, str]] = None, compression: Optional[str] = "zlib", chunk_rows: int = CHUNK_ROWS) -> None:
+        """Open `path`, creating it with `schema` (default RESULT_SCHEMA) if it does not exist."""
+        self.path = Path(path)
+        mpath = self.path/MANIFEST
+        if mpath.exists():
+            m = json.loads(mpath.read_text(encoding="utf-8"))
+            if schema is not None and schema != m["schema"]:
+                raise ValueError(f"{self.path}: schema does not match the existing store")
+        else:
+            if compression not in (None, "zlib"):
+                raise ValueError(f"unknown compression: {compression!r}")
+            self.path.mkdir(parents=True, exist_ok=True)
+            schema = dict(schema or RESULT_SCHEMA)
+            m = {"version": 1, "schema": schema, "compression": compression, "chunk_rows": int(chunk_rows),
+                 "chunks": [], "dicts": {k: [] for k, t in schema.items() if t == "str"}}
+        self.schema: Dict[str, str] = m["schema"]
+        self.compression: Optional[str] = m["compression"]
+        self.chunk_rows: int = m["chunk_rows"]
+        self._chunks: List[int] = m["chunks"]  # rows per chunk
+        self._dicts: Dict[str, List[str]] = m["dicts"]
+        self._codes = {k: {v: i for i, v in enumerate(vals)} for k, vals in self._dicts.items()}
+        self._buf: Dict[str, list] = {k: [] for k in self.schema}
+        if not mpath.exists():
+            self._write_manifest()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.flush()
+
+    def __len__(self) -> int:
+        return sum(self._chunks) + len(self._buf[next(iter(self.schema))])
+
+    # ---- writing ----
+    def append(self, row: Dict[str, Any]) -> None:
+        unknown = row.keys() - self.schema.keys()
+        if unknown:
+            raise ValueError(f"unknown result columns: {sorted(unknown)}")
+        for k, t in self.schema.items():
+            v = row.get(k)
+            if t == "str":
+                v = self._encode(k, "" if v is None else str(v))
+            self._buf[k].append(0 if v is None else v)
+        if len(self._buf[k]) >= self.chunk_rows:  # every column has the same length
+            self.flush()
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for r in rows:
+            self.append(r)
+
+    def _encode(self, col: str, value: str) -> int:
+        codes = self._codes[col]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._dicts[col])
+            self._dicts[col].append(value)
+        return code
+
+    def flush(self) -> None:
+        n = len(self._buf[next(iter(self.schema))])
+        if n == 0:
+            return
+        idx = len(self._chunks)
+        for k, t in self.schema.items():
+            arr = np.asarray(self._buf[k], dtype=np.int32 if t == "str" else t)
+            self._write_column(idx, k, arr)
+            self._buf[k].clear()
+        self._chunks.append(n)
+        self._write_manifest()
+
+    def _file(self, idx: int, col: str) -> Path:
+        return self.path/f"c{idx:06d}.{col}.{'zz' if self.compression else 'npy'}"
+
+    def _write_column(self, idx: int, col: str, arr: np.ndarray) -> None:
+        if self.compression == "zlib":
+            self._file(idx, col).write_bytes(zlib.compress(arr.tobytes(), 1))
+        else:
+            np.save(self._file(idx, col), arr, allow_pickle=False)
+
+    def _write_manifest(self) -> None:
+        m = {"version": 1, "schema": self.schema, "compression": self.compression, "chunk_rows": self.chunk_rows,
+             "chunks": self._chunks, "dicts": self._dicts}
+        tmp = self.path/(MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(m, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path/MANIFEST)
+
+    # ---- reading ----
+    def _read_column(self, idx: int, col: str) -> np.ndarray:
+        t = self.schema[col]
+        if self.compression == "zlib":
+            return np.frombuffer(zlib.decompress(self._file(idx, col).read_bytes()), dtype=np.int32 if t == "str" else t)
+        return np.load(self._file(idx, col), mmap_mode="r")
+
+    def _mask(self, idx: int, n: int, where: Optional[Where]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        mask = np.ones(n, dtype=bool)
+        for col, op, value in where:
+            data = self._read_column(idx, col)
+            if self.schema[col] == "str":
+                codes = self._codes[col]
+                if op == "in":
+                    value = [codes[v] for v in value if v in codes]
+                elif op in ("==", "!="):
+                    value = codes.get(str(value), -1)
+                else:
+                    raise ValueError(f"operator {op!r} not supported on string column {col}")
+            if op == "in":
+                mask &= np.isin(data, np.asarray(list(value)))
+            else:
+                mask &= _OPS[op](data, value)
+        return mask
+
+    def scan(self, columns: Sequence[str], where: Optional[Where] = None, *, decode: bool = False) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield {column: array} per chunk for rows matching every `where` clause (buffered rows are flushed first)."""
+        self.flush()
+        for idx, n in enumerate(self._chunks):
+            mask = self._mask(idx, n, where)
+            if mask is not None and not mask.any():
+                continue
+            out = {}
+            for col in columns:
+                data = self._read_column(idx, col)
+                data = data[mask] if mask is not None else data
+                if decode and self.schema[col] == "str":
+                    data = np.asarray(self._dicts[col], dtype=object)[data]
+                out[col] = data
+            yield out
+
+    def column(self, name: str, where: Optional[Where] = None, *, decode: bool = True) -> np.ndarray:
+        parts = [c[name] for c in self.scan([name], where, decode=decode)]
+        if not parts:
+            return np.empty(0, dtype=object if self.schema[name] == "str" else self.schema[name])
+        return np.concatenate(parts)
+
+    def aggregate(self, value: str, *, by: Optional[str] = None, where: Optional[Where] = None) -> Dict[Any, Dict[str, float]]:
+        """count/sum/mean/min/max of `value`, optionally grouped by another column."""
+        acc: Dict[Any, List[float]] = {}  # key -> [count, sum, min, max]
+        cols = [value] + ([by] if by else [])
+        for chunk in self.scan(cols, where):
+            v = np.asarray(chunk[value], dtype=np.float64)
+            if by is None:
+                groups = [(None, v)]
+            else:
+                keys, inv = np.unique(chunk[by], return_inverse=True)
+                groups = [(k, v[inv == i]) for i, k in enumerate(keys)]
+            for k, vals in groups:
+                if self.schema.get(by or "", "") == "str":
+                    k = self._dicts[by][int(k)]
+                elif k is not None:
+                    k = k.item()
+                a = acc.setdefault(k, [0, 0.0, np.inf, -np.inf])
+                a[0] += len(vals)
+                a[1] += float(vals.sum())
+                a[2] = min(a[2], float(vals.min()))
+                a[3] = max(a[3], float(vals.max()))
+        return {k: {"count": c, "sum": s, "mean": s / c, "min": lo, "max": hi} for k, (c, s, lo, hi) in acc.items()}
@@ -1,9 +1,16 @@
 from __future__ import annotations
+import math
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
 from dataclasses import dataclass
-from typing import Dict, Callable, Optional, List
+from typing import Dict, Callable, Optional, List, Iterator, Tuple
 from ..engine.models import TalentNode
+from ..analysis.talent_preview import eligible_nodes
+
+# (selected, eligible nodes) -> yields (node_id, dps gain of one more rank); runs off the Tk thread
+GainFn = Callable[[Dict[str, int], List[TalentNode]], Iterator[Tuple[str, float]]]
 
 @dataclass
 class NodeView:
@@ -38,6 +45,8 @@ class TalentTreeEditor(tk.Toplevel):
     - Hover for tooltip
     - Left click toggles rank (0->1->2..max->0)
     - Enforces prereqs (simple: you can't rank a node unless prereqs have rank>0)
+    - Optional live preview (gain_fn): DPS gain of one more rank per node, shown in the
+      tooltip and as a heat overlay; computed in a background thread after each change
     """
     def __init__(
         self,
@@ -49,6 +58,7 @@ class TalentTreeEditor(tk.Toplevel):
         title: str = "Talent Tree",
         canvas_w: int = 900,
         canvas_h: int = 520,
+        gain_fn: Optional[GainFn] = None,
     ):
         super().__init__(master)
         self.title(title)
@@ -62,7 +72,17 @@ class TalentTreeEditor(tk.Toplevel):
         self.canvas_w = canvas_w
         self.canvas_h = canvas_h
 
+        self.gain_fn = gain_fn
+        self.gains: Dict[str, float] = {}
+        self._gain_cache: Dict[frozenset, Dict[str, float]] = {}
+        self._gain_gen = 0
+        # (generation, selection key or None on failure, node_id or None when done, gain)
+        self._gain_queue: "queue.Queue[Tuple[int, Optional[frozenset], Optional[str], float]]" = queue.Queue()
+        self.node_items: Dict[str, int] = {}
+
         self._build()
+        if self.gain_fn is not None:
+            self._poll_gains()
 
     def _build(self):
         top = ttk.Frame(self, padding=10)
@@ -81,6 +101,8 @@ class TalentTreeEditor(tk.Toplevel):
 
         self.points_var = tk.StringVar(value="")
         ttk.Label(header, textvariable=self.points_var).pack(side="right")
+        self.preview_var = tk.StringVar(value="")
+        ttk.Label(header, textvariable=self.preview_var).pack(side="right", padx=12)
 
         self.canvas = tk.Canvas(top, width=self.canvas_w, height=self.canvas_h)
         self.canvas.pack(fill="both", expand=True, pady=(10, 10))
@@ -99,10 +121,84 @@ class TalentTreeEditor(tk.Toplevel):
         self.canvas.bind("<Button-1>", self.on_click)
 
         self.render()
+        self._request_gains()
 
     def clear(self):
         self.selected = {}
         self.render()
+        self._request_gains()
+
+    # ---- live preview -------------------------------------------------
+    def _request_gains(self):
+        """Start (or reuse cached) gain evaluation for the current selection."""
+        if self.gain_fn is None:
+            return
+        key = frozenset((k, int(v)) for k, v in self.selected.items() if int(v) > 0)
+        self._gain_gen += 1
+        cached = self._gain_cache.get(key)
+        if cached is not None:
+            self.gains = dict(cached)
+            self.preview_var.set("Preview: ready")
+            self._apply_heat()
+            return
+        # Keep last gains visible until new ones arrive; they update node by node.
+        self.preview_var.set("Preview: computing...")
+        gen, selected = self._gain_gen, dict(self.selected)
+        nodes = eligible_nodes(self.talents, selected)
+
+        def work():
+            try:
+                for node_id, gain in self.gain_fn(selected, nodes):
+                    if gen != self._gain_gen:
+                        return  # superseded by a newer click
+                    self._gain_queue.put((gen, key, node_id, gain))
+            except Exception:
+                self._gain_queue.put((gen, None, None, 0.0))  # failed: nothing to cache
+                return
+            self._gain_queue.put((gen, key, None, 0.0))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _poll_gains(self):
+        changed = False
+        try:
+            while True:
+                gen, key, node_id, gain = self._gain_queue.get_nowait()
+                if gen != self._gain_gen:
+                    continue
+                if key is None:
+                    self.preview_var.set("Preview: unavailable")
+                elif node_id is None:
+                    # finished: drop gains of nodes that are no longer eligible
+                    eligible = {n.id for n in eligible_nodes(self.talents, self.selected)}
+                    self.gains = {k: v for k, v in self.gains.items() if k in eligible}
+                    self._gain_cache[key] = dict(self.gains)
+                    self.preview_var.set("Preview: ready")
+                else:
+                    self.gains[node_id] = gain
+                changed = True
+        except queue.Empty:
+            pass
+        try:
+            if changed:
+                self._apply_heat()
+            self.after(60, self._poll_gains)
+        except tk.TclError:
+            pass  # window closed
+
+    def _heat_color(self, gain: float, best: float) -> str:
+        if best <= 0 or gain <= 0:
+            return ""
+        t = min(1.0, gain / best)
+        # white -> orange
+        g = int(255 - 120 * t)
+        b = int(255 - 255 * t)
+        return f"#ff{g:02x}{b:02x}"
+
+    def _apply_heat(self):
+        best = max(self.gains.values(), default=0.0)
+        for node_id, item in self.node_items.items():
+            self.canvas.itemconfigure(item, fill=self._heat_color(self.gains.get(node_id, 0.0), best))
 
     def apply(self):
         # prune zero ranks
@@ -132,6 +228,14 @@ class TalentTreeEditor(tk.Toplevel):
         lines.append(f"Rank: {rank}/{node.max_rank}")
         if node.prereq:
             lines.append(f"Prereq: {', '.join(node.prereq)}")
+        if self.gain_fn is not None and rank < int(node.max_rank):
+            # same test as eligible_nodes(): gains only ever arrive for nodes whose prereqs are ranked
+            if not self._can_increase(node):
+                missing = [pid for pid in (node.prereq or []) if int(self.selected.get(pid, 0)) <= 0]
+                lines.append(f"Next rank: requires {', '.join(missing)}")
+            else:
+                gain = self.gains.get(node.id)
+                lines.append(f"Next rank: {gain:+.1f} DPS" if gain is not None else "Next rank: computing...")
         return "\n".join(lines)
 
     def _resolve_xy(self, node: TalentNode):
@@ -145,6 +249,7 @@ class TalentTreeEditor(tk.Toplevel):
         self.canvas.delete("all")
         self.node_views.clear()
         self.text_to_item.clear()
+        self.node_items.clear()
 
         tree_filter = self.tree_var.get()
         nodes = list(self.talents.values())
@@ -187,8 +292,10 @@ class TalentTreeEditor(tk.Toplevel):
             txt = self.canvas.create_text(x, y, text=label, font=("Segoe UI", 10, "bold"))
             self.node_views[item] = NodeView(node=n, item_id=item, text_id=txt)
             self.text_to_item[txt] = item
+            self.node_items[n.id] = item
 
         self.points_var.set(f"Points: {self._points()}")
+        self._apply_heat()
 
     def _hit_test(self, item_id: int) -> Optional[NodeView]:
         if item_id in self.node_views:
@@ -240,3 +347,4 @@ class TalentTreeEditor(tk.Toplevel):
             self.selected[node.id] = nxt
 
         self.render()
+        self._request_gains()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents
+from cod_simulator.engine.models import SimConfig
+from cod_simulator.analysis.calibration import Calibrator, DEFAULT_FIT, FIT_PARAMS, load_observations
+
+def main():
+    ap = argparse.ArgumentParser(description="Fit SimConfig constants to observed battle reports")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--observations", required=True, help='JSON: {"observations": [{"attacker": {build}, "defender": {build}, "duration_s", "damage"}]}')
+    ap.add_argument("--fit", default=",".join(DEFAULT_FIT), help=f"Comma-separated, from {','.join(FIT_PARAMS)}")
+    ap.add_argument("--samples", type=int, default=64, help="Latin hypercube points before the local search")
+    ap.add_argument("--starts", type=int, default=3, help="Nelder-Mead runs from the best samples")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=1, help="Processes/threads for each batch of observations")
+    ap.add_argument("--out", default=None, help="Write the fit summary as JSON")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    cal = Calibrator(
+        load_observations(args.observations),
+        heroes=load_heroes(data/"heroes.json"),
+        artifacts=load_artifacts(data/"artifacts.json"),
+        pets=load_pets(data/"pets.json"),
+        talent_nodes=load_talents(data/"talents.json"),
+        base_config=SimConfig(),
+        fit=[k.strip() for k in args.fit.split(",") if k.strip()],
+        workers=args.workers,
+    )
+    summary = cal.fit_params(samples=args.samples, starts=args.starts, seed=args.seed).summary()
+    for k, v in summary["params"].items():
+        s, ci = summary["std"][k], summary["ci95"][k]
+        if k in summary["piecewise"]:
+            a, b = summary["plateaus"][k]
+            print(f"{k:>18}: {v:12.4f}  piecewise: plateau [{a:.4f}, {b:.4f}], 95% [{ci[0]:.4f}, {ci[1]:.4f}]")
+        else:
+            print(f"{k:>18}: {v:12.4f}  +/- {'n/a' if s is None else f'{1.96 * s:.4f}'}")
+    print(f"rmse(log) {summary['rmse_log']:.4f}  mean |error| {summary['mean_abs_pct_error']:.2f}%  ({summary['evaluations']} evaluations)")
+    if args.out:
+        Path(args.out).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
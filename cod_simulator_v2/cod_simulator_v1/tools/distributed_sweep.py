@@ -0,0 +1,77 @@
+from __future__ import annotations
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.io.catalog import catalog_hash
+from cod_simulator.io.results import ResultStore, result_row
+from cod_simulator.engine.models import SimConfig
+from cod_simulator.analysis.batch import matchup_scenarios
+from cod_simulator.analysis.distributed import Coordinator, run_worker
+
+def _catalogs(data: Path):
+    return dict(heroes=load_heroes(data/"heroes.json"), artifacts=load_artifacts(data/"artifacts.json"),
+                pets=load_pets(data/"pets.json"), talent_nodes=load_talents(data/"talents.json"))
+
+def _worker(data: str, host: str, port: int) -> None:
+    n = run_worker((host, port), **_catalogs(Path(data)))
+    print(f"worker done: {n} chunks")
+
+def main():
+    ap = argparse.ArgumentParser(description="Hero-vs-hero sweep spread over TCP workers")
+    sub = ap.add_subparsers(dest="role", required=True)
+    co = sub.add_parser("coordinator", help="Hand out scenario chunks and collect results")
+    co.add_argument("--data", default="data")
+    co.add_argument("--builds", default=None)
+    co.add_argument("--durations", default="60", help="Comma-separated seconds")
+    co.add_argument("--targets", type=int, default=1)
+    co.add_argument("--montecarlo", action="store_true", default=False)
+    co.add_argument("--seed", type=int, default=None)
+    co.add_argument("--host", default="127.0.0.1")
+    co.add_argument("--port", type=int, default=5555)
+    co.add_argument("--chunk", type=int, default=64, help="Scenarios per chunk")
+    co.add_argument("--timeout", type=float, default=300.0, help="Seconds before an unanswered chunk is re-queued")
+    co.add_argument("--spawn", type=int, default=0, help="Also start this many local worker processes")
+    co.add_argument("--store", default=None, help="Append results to this columnar result store instead of printing CSV")
+    wk = sub.add_parser("worker", help="Run chunks for a coordinator")
+    wk.add_argument("--data", default="data")
+    wk.add_argument("--connect", default="127.0.0.1:5555", help="host:port of the coordinator")
+    args = ap.parse_args()
+
+    if args.role == "worker":
+        host, _, port = args.connect.rpartition(":")
+        _worker(args.data, host, int(port))
+        return
+
+    data = Path(args.data)
+    cats = _catalogs(data)
+    heroes = cats["heroes"]
+    builds = load_builds(args.builds) if args.builds else {}
+    configs = [SimConfig(duration_s=int(x), deterministic=not args.montecarlo, target_count=args.targets)
+               for x in args.durations.split(",") if x.strip()]
+    scenarios = matchup_scenarios(heroes, builds, configs)
+
+    coord = Coordinator(scenarios, catalog_hash(heroes, cats["artifacts"], cats["pets"], cats["talent_nodes"]),
+                        host=args.host, port=args.port, chunk_size=args.chunk, seed=args.seed, timeout=args.timeout)
+    host, port = coord.address
+    print(f"coordinator on {host}:{port}: {len(scenarios)} scenarios in {len(coord.chunks)} chunks")
+    procs = [mp.Process(target=_worker, args=(args.data, host, port)) for _ in range(args.spawn)]
+    for p in procs:
+        p.start()
+    if args.store:
+        with ResultStore(args.store) as store:
+            for sc, r in coord.results():
+                store.append(result_row(r, attacker_id=sc.attacker_build.hero_id, defender_id=sc.defender_build.hero_id,
+                                        config=sc.config, attacker_build=sc.attacker_build, defender_build=sc.defender_build))
+        print(f"Appended {len(scenarios)} rows to {args.store} ({len(store)} total)")
+    else:
+        print("attacker,defender,duration_s,total_damage,dps")
+        for sc, r in coord.results():
+            print(f"{sc.attacker_build.hero_id},{sc.defender_build.hero_id},{sc.config.duration_s},{r['total_damage']:.3f},{r['dps']:.3f}")
+    for p in procs:
+        p.join()
+    if coord.requeued:
+        print(f"{coord.requeued} chunks re-queued after worker failures")
+
+if __name__ == "__main__":
+    main()
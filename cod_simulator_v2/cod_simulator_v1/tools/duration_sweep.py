@@ -0,0 +1,55 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import Build, SimConfig
+from cod_simulator.engine.simulation import CombatSimulator
+from cod_simulator.io.results import ResultStore, result_row
+
+def main():
+    ap = argparse.ArgumentParser(description="Damage/DPS at many fight durations from a single run")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--builds", default=None)
+    ap.add_argument("--attacker", default="attacker_demo")
+    ap.add_argument("--defender", default="defender_demo")
+    ap.add_argument("--durations", default="10:3600:10", help="start:stop:step or comma-separated seconds")
+    ap.add_argument("--targets", type=int, default=1)
+    ap.add_argument("--tick", type=float, default=1.0)
+    ap.add_argument("--store", default=None, help="Append results to this columnar result store instead of printing CSV")
+    args = ap.parse_args()
+
+    if ":" in args.durations:
+        start, stop, step = (float(x) for x in args.durations.split(":"))
+        durations = [start + i * step for i in range(int((stop - start) / step + 1e-9) + 1)]
+    else:
+        durations = [float(x) for x in args.durations.split(",") if x.strip()]
+
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    builds = load_builds(args.builds) if args.builds else {}
+    att = builds.get(args.attacker) or Build(hero_id=args.attacker)
+    dfn = builds.get(args.defender) or Build(hero_id=args.defender)
+    cfg = SimConfig(duration_s=int(max(durations)), target_count=args.targets, tick_s=args.tick)
+    sim = CombatSimulator(
+        attacker_hero=heroes[att.hero_id],
+        defender_hero=heroes[dfn.hero_id],
+        attacker_build=att,
+        defender_build=dfn,
+        artifacts=load_artifacts(data/"artifacts.json"),
+        pets=load_pets(data/"pets.json"),
+        talent_nodes=load_talents(data/"talents.json"),
+        config=cfg,
+    )
+    if args.store:
+        with ResultStore(args.store) as store:
+            for r in sim.run(horizons=durations):
+                store.append(result_row(r, attacker_id=att.hero_id, defender_id=dfn.hero_id, config=cfg, attacker_build=att, defender_build=dfn))
+        print(f"Appended {len(durations)} rows to {args.store} ({len(store)} total)")
+        return
+    print("duration_s,total_damage,dps,normal,skill,aoe_extra,dot,final_rage")
+    for r in sim.run(horizons=durations):
+        b = r["breakdown"]
+        print(f"{r['duration_s']:g},{r['total_damage']:.3f},{r['dps']:.3f},{b['normal']:.3f},{b['skill']:.3f},{b['aoe_extra']:.3f},{b['dot']:.3f},{r['final_rage']:.3f}")
+
+if __name__ == "__main__":
+    main()
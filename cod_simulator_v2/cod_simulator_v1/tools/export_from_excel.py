@@ -7,8 +7,9 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--excel", required=True, help="Path to Excel workbook")
     ap.add_argument("--out", default="data", help="Output folder for JSON")
+    ap.add_argument("--workers", type=int, default=None, help="Sheet parser processes (1 = serial)")
     args = ap.parse_args()
-    out = export_v1_json(Path(args.excel), Path(args.out))
+    out = export_v1_json(Path(args.excel), Path(args.out), workers=args.workers)
     print("Exported:")
     for k,v in out.items():
         print(f" - {k}: {v}")
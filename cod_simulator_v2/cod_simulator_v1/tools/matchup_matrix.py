@@ -0,0 +1,53 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import SimConfig
+from cod_simulator.analysis.matchups import reference_stats, matchup_matrix
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulate every hero against every other hero")
+    ap.add_argument("--data", default="data", help="Folder with heroes/artifacts/pets/talents JSON")
+    ap.add_argument("--builds", default=None, help="Optional JSON of reference builds per hero")
+    ap.add_argument("--out", default="matchups", help="Output folder")
+    ap.add_argument("--duration", type=int, default=60)
+    ap.add_argument("--montecarlo", action="store_true", default=False)
+    ap.add_argument("--targets", type=int, default=1)
+    ap.add_argument("--no-counter", action="store_true", default=False)
+    ap.add_argument("--rage-normal", type=float, default=94)
+    ap.add_argument("--rage-counter", type=float, default=16)
+    ap.add_argument("--def-const", type=float, default=1400.0)
+    ap.add_argument("--tile", type=int, default=16, help="Pairs per tile side")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    builds = load_builds(args.builds) if args.builds else {}
+    stats = reference_stats(
+        heroes, builds,
+        artifacts=load_artifacts(data/"artifacts.json"),
+        pets=load_pets(data/"pets.json"),
+        talent_nodes=load_talents(data/"talents.json"),
+    )
+    cfg = SimConfig(
+        duration_s=args.duration,
+        deterministic=not args.montecarlo,
+        target_count=args.targets,
+        counter_enabled=not args.no_counter,
+        rage_on_normal=args.rage_normal,
+        rage_on_counter=args.rage_counter,
+        defense_constant=args.def_const,
+    )
+    matrix = matchup_matrix(heroes, stats, cfg, tile=args.tile, workers=args.workers)
+    paths = matrix.write(args.out)
+
+    print("Overall ranking (avg dps dealt - avg dps taken):")
+    for pos, row in enumerate(matrix.rankings()["overall"][:10], start=1):
+        print(f" {pos:>3}. {row['hero_id']}: net {row['net']:.1f} (dealt {row['avg_dps_dealt']:.1f}, taken {row['avg_dps_taken']:.1f})")
+    print("Wrote:")
+    for k, v in paths.items():
+        print(f" - {k}: {v}")
+
+if __name__ == "__main__":
+    main()
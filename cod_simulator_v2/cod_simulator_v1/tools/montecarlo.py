@@ -0,0 +1,81 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import Build, SimConfig
+from cod_simulator.engine.stats import resolve_build_stats
+from cod_simulator.engine.simulation import CombatSimulator
+from cod_simulator.analysis.streaming import MonteCarloStats
+from cod_simulator.analysis.tail import estimate_tail
+
+def _setup(args):
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    artifacts, pets, talents = load_artifacts(data/"artifacts.json"), load_pets(data/"pets.json"), load_talents(data/"talents.json")
+    builds = load_builds(args.builds) if args.builds else {}
+    att = builds.get(args.attacker) or Build(hero_id=args.attacker)
+    dfn = builds.get(args.defender) or Build(hero_id=args.defender)
+    att_stats = resolve_build_stats(heroes[att.hero_id], att, artifacts=artifacts, pets=pets, talent_nodes=talents)
+    def_stats = resolve_build_stats(heroes[dfn.hero_id], dfn, artifacts=artifacts, pets=pets, talent_nodes=talents)
+    cfg = SimConfig(duration_s=args.duration, deterministic=False, target_count=args.targets)
+    return heroes[att.hero_id], att_stats, def_stats, cfg
+
+def _trials(args, seed: int, n: int) -> MonteCarloStats:
+    hero, att_stats, def_stats, cfg = _setup(args)
+    rng = random.Random(seed)
+    acc = MonteCarloStats(hist_range=(args.hist_lo, args.hist_hi) if args.hist_hi > args.hist_lo else None)
+    for _ in range(n):
+        sim = CombatSimulator.from_stats(attacker_hero=hero, attacker_stats=att_stats, defender_stats=def_stats, config=cfg, rng=rng)
+        acc.add(sim.run())
+    return acc
+
+def main():
+    ap = argparse.ArgumentParser(description="Monte Carlo crit rolling with constant-memory statistics")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--builds", default=None)
+    ap.add_argument("--attacker", default="attacker_demo")
+    ap.add_argument("--defender", default="defender_demo")
+    ap.add_argument("--duration", type=int, default=60)
+    ap.add_argument("--targets", type=int, default=1)
+    ap.add_argument("--trials", type=int, default=10000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--hist-lo", type=float, default=0.0)
+    ap.add_argument("--hist-hi", type=float, default=0.0, help="Enable a dps histogram over [lo, hi)")
+    ap.add_argument("--tail", type=float, default=0.0, help="Importance-sample the dps quantile at this tail probability, e.g. 0.001")
+    ap.add_argument("--upper", action="store_true", default=False, help="With --tail: best fights instead of worst")
+    ap.add_argument("--tilt", type=float, default=None, help="With --tail: crit log-odds shift (default: chosen from pilot runs)")
+    ap.add_argument("--skill-only", action="store_true", default=False, help="With --tail: bias skill crits only")
+    args = ap.parse_args()
+
+    if args.tail > 0:
+        hero, att_stats, def_stats, cfg = _setup(args)
+        tilt = None if args.tilt is None else (0.0 if args.skill_only else args.tilt, args.tilt)
+        est = estimate_tail(hero, att_stats, def_stats, cfg, q=args.tail, upper=args.upper, trials=args.trials,
+                            tilt=tilt, skill_only=args.skill_only, seed=args.seed)
+        print(json.dumps(est.summary(), indent=2))
+        if est.degenerate(0.1):
+            print(f"warning: tail ESS {est.tail_ess:.1f} of {est.tail_hits} tail trials; the interval is unreliable, use a milder --tilt",
+                  file=sys.stderr)
+        return
+
+    workers = max(1, args.workers)
+    sizes = [args.trials // workers + (1 if i < args.trials % workers else 0) for i in range(workers)]
+    seeds = [args.seed * 1000003 + i for i in range(workers)]
+    if workers == 1:
+        parts = [_trials(args, seeds[0], sizes[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_trials, [args] * workers, seeds, sizes))
+    total = parts[0]
+    for p in parts[1:]:
+        total.merge(p)
+    print(json.dumps(total.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import SimConfig
+from cod_simulator.analysis.matchups import reference_stats
+from cod_simulator.analysis.pairings import rank_pairings
+
+def main():
+    ap = argparse.ArgumentParser(description="Rank primary/secondary hero pairings against a target hero")
+    ap.add_argument("--data", default="data", help="Folder with heroes/artifacts/pets/talents JSON")
+    ap.add_argument("--builds", default=None, help="Optional JSON of reference builds per hero")
+    ap.add_argument("--target", required=True, help="Defending hero id (uses its reference build)")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--duration", type=int, default=60)
+    ap.add_argument("--targets", type=int, default=1)
+    ap.add_argument("--no-counter", action="store_true", default=False)
+    ap.add_argument("--def-const", type=float, default=1400.0)
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    builds = load_builds(args.builds) if args.builds else {}
+    stats = reference_stats(
+        heroes, builds,
+        artifacts=load_artifacts(data/"artifacts.json"),
+        pets=load_pets(data/"pets.json"),
+        talent_nodes=load_talents(data/"talents.json"),
+    )
+    cfg = SimConfig(duration_s=args.duration, target_count=args.targets, counter_enabled=not args.no_counter, defense_constant=args.def_const)
+    ranked, counts = rank_pairings(heroes, stats, stats[args.target], cfg, top_k=args.top)
+
+    print(f"Simulated {counts['simulated']} of {counts['pairs']} pairs")
+    for pos, pr in enumerate(ranked, start=1):
+        print(f" {pos:>3}. {pr.primary} + {pr.secondary}: dps {pr.dps:.1f} (bound {pr.bound:.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import SimConfig
+from cod_simulator.analysis.batch import matchup_scenarios
+from cod_simulator.analysis.journal import run_checkpointed
+
+def main():
+    ap = argparse.ArgumentParser(description="Hero-vs-hero sweep that resumes from its journal after an interruption")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--builds", default=None)
+    ap.add_argument("--durations", default="60", help="Comma-separated seconds")
+    ap.add_argument("--targets", type=int, default=1)
+    ap.add_argument("--montecarlo", action="store_true", default=False)
+    ap.add_argument("--runs", type=int, default=1, help="Repeats of every matchup (Monte Carlo)")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--journal", default="sweep.journal", help="Checkpoint file; rerun the same command to resume")
+    ap.add_argument("--every", type=int, default=256, help="Scenarios per checkpoint")
+    ap.add_argument("--by", choices=("attacker", "defender", "scenario", "all"), default="attacker")
+    ap.add_argument("--out", default=None, help="Write the aggregates as JSON")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    builds = load_builds(args.builds) if args.builds else {}
+    configs = [SimConfig(duration_s=int(x), deterministic=not args.montecarlo, target_count=args.targets)
+               for x in args.durations.split(",") if x.strip()] * max(1, args.runs)
+    summary = run_checkpointed(
+        matchup_scenarios(heroes, builds, configs),
+        heroes=heroes,
+        artifacts=load_artifacts(data/"artifacts.json"),
+        pets=load_pets(data/"pets.json"),
+        talent_nodes=load_talents(data/"talents.json"),
+        journal=args.journal,
+        checkpoint_every=args.every,
+        by=None if args.by == "all" else args.by,
+        seed=args.seed,
+    )
+    for group, s in summary.items():
+        print(f"{group}: n={s['n']} mean={s['mean']:.3f} std={s['std']:.3f} min={s['min']:.3f} max={s['max']:.3f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
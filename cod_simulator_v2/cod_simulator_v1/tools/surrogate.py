@@ -0,0 +1,64 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import Build, SimConfig
+from cod_simulator.engine.stats import resolve_build_stats
+from cod_simulator.analysis.surrogate import DEFAULT_BOUNDS, DpsSurrogate, train_surrogate
+
+def main():
+    ap = argparse.ArgumentParser(description="Train or query a surrogate dps model for one attacker/defender pairing")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    tr = sub.add_parser("train")
+    tr.add_argument("--data", default="data")
+    tr.add_argument("--builds", default=None)
+    tr.add_argument("--attacker", default="attacker_demo")
+    tr.add_argument("--defender", default="defender_demo")
+    tr.add_argument("--duration", type=int, default=60)
+    tr.add_argument("--targets", type=int, default=1)
+    tr.add_argument("--bounds", default=None, help='JSON {"attack": [500, 5000], ...} (default: all surrogate stats, built-in ranges)')
+    tr.add_argument("--samples", type=int, default=512)
+    tr.add_argument("--test-samples", type=int, default=128)
+    tr.add_argument("--seed", type=int, default=0)
+    tr.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    tr.add_argument("--out", default="surrogate.json")
+    qu = sub.add_parser("query")
+    qu.add_argument("--data", default="data")
+    qu.add_argument("--model", default="surrogate.json")
+    qu.add_argument("stats", nargs="*", help="stat=value pairs, e.g. attack=3000 crit_chance=0.4 defense=1500")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    heroes = load_heroes(data/"heroes.json")
+    if args.cmd == "query":
+        model = DpsSurrogate.load(args.model)
+        model.hero = heroes.get(model.attacker_id)  # simulator fallback outside the trained bounds
+        values = {k: float(v) for k, _, v in (s.partition("=") for s in args.stats)}
+        dps, source = model.dps(values)
+        print(f"dps {dps:.3f} ({source})")
+        return
+
+    builds = load_builds(args.builds) if args.builds else {}
+    att = builds.get(args.attacker) or Build(hero_id=args.attacker)
+    dfn = builds.get(args.defender) or Build(hero_id=args.defender)
+    res = dict(artifacts=load_artifacts(data/"artifacts.json"), pets=load_pets(data/"pets.json"), talent_nodes=load_talents(data/"talents.json"))
+    bounds = json.loads(args.bounds) if args.bounds else DEFAULT_BOUNDS
+    model = train_surrogate(
+        heroes[att.hero_id],
+        resolve_build_stats(heroes[att.hero_id], att, **res),
+        resolve_build_stats(heroes[dfn.hero_id], dfn, **res),
+        SimConfig(duration_s=args.duration, target_count=args.targets),
+        bounds={k: tuple(v) for k, v in bounds.items()},
+        samples=args.samples,
+        test_samples=args.test_samples,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    model.save(args.out)
+    print(json.dumps(model.metrics, indent=2))
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents, load_builds
+from cod_simulator.engine.models import Build, SimConfig
+from cod_simulator.analysis.talent_alloc import allocate_talents, rank_values_from_dps, rank_values_from_weights
+
+def main():
+    ap = argparse.ArgumentParser(description="Best talent ranks for every point budget 0..N")
+    ap.add_argument("--data", default="data")
+    ap.add_argument("--builds", default=None)
+    ap.add_argument("--attacker", default="attacker_demo")
+    ap.add_argument("--defender", default="defender_demo")
+    ap.add_argument("--side", choices=("attacker", "defender"), default="attacker", help="Whose talents to allocate")
+    ap.add_argument("--budget", type=int, default=30)
+    ap.add_argument("--duration", type=int, default=60)
+    ap.add_argument("--weights", default=None, help='Stat weights as inline JSON, e.g. {"attack": 1, "crit_chance": 900}, or a path to such a file (default: DPS gains)')
+    ap.add_argument("--out", default=None, help="Write all budgets as JSON")
+    args = ap.parse_args()
+
+    data = Path(args.data)
+    talents = load_talents(data/"talents.json")
+    if args.weights:
+        raw = args.weights if args.weights.lstrip().startswith("{") else Path(args.weights).read_text(encoding="utf-8")
+        values = rank_values_from_weights(talents, json.loads(raw))
+    else:
+        heroes = load_heroes(data/"heroes.json")
+        builds = load_builds(args.builds) if args.builds else {}
+        values = rank_values_from_dps(
+            talents,
+            side=args.side,
+            attacker_hero=heroes[args.attacker],
+            defender_hero=heroes[args.defender],
+            attacker_build=builds.get(args.attacker) or Build(hero_id=args.attacker),
+            defender_build=builds.get(args.defender) or Build(hero_id=args.defender),
+            artifacts=load_artifacts(data/"artifacts.json"),
+            pets=load_pets(data/"pets.json"),
+            talent_nodes=talents,
+            config=SimConfig(duration_s=args.duration),
+        )
+    plans = allocate_talents(talents, values, args.budget)
+    for b, (value, sel) in enumerate(plans):
+        print(f"{b:>4}: {value:10.2f}  {json.dumps(sel)}")
+    if args.out:
+        rows = [{"budget": b, "value": v, "selected_talents": sel} for b, (v, sel) in enumerate(plans)]
+        Path(args.out).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,20 @@
 import json
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
 
-from cod_simulator.io.json_loader import load_heroes, load_artifacts, load_pets, load_talents
+from cod_simulator.io.catalog import CatalogManager
 from cod_simulator.io.excel_export import export_v1_json
 from cod_simulator.engine.models import Build, SimConfig
 from cod_simulator.engine.simulation import CombatSimulator
 from cod_simulator.ui.talent_editor import TalentTreeEditor
+from cod_simulator.analysis.talent_preview import iter_rank_gains
 
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 DEFAULT_EXCEL = BASE_DIR / "spreadsheets" / "Call of Dragons Database.xlsx"
+CATALOG_POLL_MS = 1500
 
 def safe_float(s, default=0.0):
     try:
@@ -36,16 +39,60 @@ class App(tk.Tk):
 
         self._load_data()
         self._ui()
+        self.after(CATALOG_POLL_MS, self._poll_catalog)
 
     def _load_data(self):
-        self.heroes = load_heroes(DATA_DIR / "heroes.json")
-        self.artifacts = load_artifacts(DATA_DIR / "artifacts.json")
-        self.pets = load_pets(DATA_DIR / "pets.json")
-        self.talents = load_talents(DATA_DIR / "talents.json")
+        # Catalog dicts are updated in place by the manager when files in ./data change.
+        try:
+            self.catalog = CatalogManager(DATA_DIR)
+        except Exception as e:
+            messagebox.showerror("Data load failed", f"Could not load {DATA_DIR}:\n{e}")
+            raise
+        self._shown_errors = {}
+        self.heroes = self.catalog.heroes
+        self.artifacts = self.catalog.artifacts
+        self.pets = self.catalog.pets
+        self.talents = self.catalog.talents
+        self._refresh_ids()
+        self.catalog.subscribe(self._on_catalog_change)
+
+    def _refresh_ids(self):
         self.hero_ids = list(self.heroes.keys())
         self.artifact_ids = ["(none)"] + list(self.artifacts.keys())
         self.pet_ids = ["(none)"] + list(self.pets.keys())
 
+    def _poll_catalog(self):
+        self.catalog.refresh()
+        self._report_catalog_errors()
+        self.after(CATALOG_POLL_MS, self._poll_catalog)
+
+    def _report_catalog_errors(self):
+        # Each new load error is shown once; the last good data stays in use until the file is fixed.
+        errors = dict(self.catalog.errors)
+        for kind, msg in errors.items():
+            if self._shown_errors.get(kind) != msg and hasattr(self, "text"):
+                self.text.insert("end", f"\nCatalog {kind} not reloaded (keeping previous data): {msg}\n")
+        for kind in self._shown_errors.keys() - errors.keys():
+            if hasattr(self, "text"):
+                self.text.insert("end", f"\nCatalog {kind} load error resolved.\n")
+        self._shown_errors = errors
+
+    def _on_catalog_change(self, change):
+        self._refresh_ids()
+        values = {"heroes": self.hero_ids, "artifacts": self.artifact_ids, "pets": self.pet_ids}
+        if change.kind in values:
+            for cb, var in self._combos.get(change.kind, []):
+                cb.configure(values=values[change.kind])
+                if var.get() in change.removed:
+                    var.set(values[change.kind][0] if values[change.kind] else "")
+        if change.kind == "talents":
+            for sel, points in ((self.att_selected_talents, self.att_points), (self.def_selected_talents, self.def_points)):
+                for tid in change.removed & sel.keys():
+                    del sel[tid]
+                points.set(self._points_str(sel))
+        if hasattr(self, "text"):
+            self.text.insert("end", f"\nCatalog {change.kind} updated: +{len(change.added)} -{len(change.removed)} ~{len(change.changed)}\n")
+
     def _ui(self):
         root = ttk.Frame(self, padding=12)
         root.pack(fill="both", expand=True)
@@ -70,13 +117,18 @@ class App(tk.Tk):
         self.def_extra = tk.StringVar(value="{}")
         self.def_points = tk.StringVar(value="Talents: 0 pts")
 
+        self._combos = {"heroes": [], "artifacts": [], "pets": []}
+
         def build_side(frame, hero_var, art_var, pet_var, extra_var, points_var, open_talents_fn):
-            ttk.Label(frame, text="Hero").grid(row=0, column=0, sticky="w")
-            ttk.Combobox(frame, textvariable=hero_var, values=self.hero_ids, state="readonly").grid(row=0, column=1, sticky="ew")
-            ttk.Label(frame, text="Artifact").grid(row=1, column=0, sticky="w")
-            ttk.Combobox(frame, textvariable=art_var, values=self.artifact_ids, state="readonly").grid(row=1, column=1, sticky="ew")
-            ttk.Label(frame, text="Pet").grid(row=2, column=0, sticky="w")
-            ttk.Combobox(frame, textvariable=pet_var, values=self.pet_ids, state="readonly").grid(row=2, column=1, sticky="ew")
+            for row, (label, kind, var, values) in enumerate([
+                ("Hero", "heroes", hero_var, self.hero_ids),
+                ("Artifact", "artifacts", art_var, self.artifact_ids),
+                ("Pet", "pets", pet_var, self.pet_ids),
+            ]):
+                ttk.Label(frame, text=label).grid(row=row, column=0, sticky="w")
+                cb = ttk.Combobox(frame, textvariable=var, values=values, state="readonly")
+                cb.grid(row=row, column=1, sticky="ew")
+                self._combos[kind].append((cb, var))
 
             ttk.Button(frame, text="Edit Talents...", command=open_talents_fn).grid(row=3, column=0, sticky="w")
             ttk.Label(frame, textvariable=points_var).grid(row=3, column=1, sticky="w")
@@ -99,6 +151,8 @@ class App(tk.Tk):
         self.defc = tk.StringVar(value="1400")
         self.counter = tk.BooleanVar(value=True)
         self.det = tk.BooleanVar(value=True)
+        self.tick = tk.StringVar(value="1.0")
+        self.atk_iv = tk.StringVar(value="1.0")
 
         ttk.Label(cfg, text="Duration").grid(row=0, column=0, sticky="w")
         ttk.Entry(cfg, textvariable=self.duration, width=8).grid(row=0, column=1, sticky="w", padx=(6,12))
@@ -114,8 +168,13 @@ class App(tk.Tk):
         ttk.Label(cfg, text="Defense const").grid(row=1, column=4, sticky="w")
         ttk.Entry(cfg, textvariable=self.defc, width=8).grid(row=1, column=5, sticky="w", padx=(6,12))
 
-        ttk.Checkbutton(cfg, text="Counter enabled", variable=self.counter).grid(row=2, column=0, sticky="w")
-        ttk.Checkbutton(cfg, text="Deterministic (EV crit)", variable=self.det).grid(row=2, column=2, sticky="w")
+        ttk.Label(cfg, text="Tick (s)").grid(row=2, column=0, sticky="w")
+        ttk.Entry(cfg, textvariable=self.tick, width=8).grid(row=2, column=1, sticky="w", padx=(6,12))
+        ttk.Label(cfg, text="Attack interval (s)").grid(row=2, column=2, sticky="w")
+        ttk.Entry(cfg, textvariable=self.atk_iv, width=8).grid(row=2, column=3, sticky="w", padx=(6,12))
+
+        ttk.Checkbutton(cfg, text="Counter enabled", variable=self.counter).grid(row=3, column=0, sticky="w")
+        ttk.Checkbutton(cfg, text="Deterministic (EV crit)", variable=self.det).grid(row=3, column=2, sticky="w")
 
         actions = ttk.Frame(root)
         actions.pack(fill="x", pady=(0,10))
@@ -135,13 +194,30 @@ class App(tk.Tk):
         def apply(sel):
             self.att_selected_talents = sel
             self.att_points.set(self._points_str(sel))
-        TalentTreeEditor(self, self.talents, self.att_selected_talents, on_apply=apply, title="Attacker Talents")
+        TalentTreeEditor(self, self.talents, self.att_selected_talents, on_apply=apply, title="Attacker Talents",
+                         gain_fn=self._gain_fn("attacker"))
 
     def open_def_talents(self):
         def apply(sel):
             self.def_selected_talents = sel
             self.def_points.set(self._points_str(sel))
-        TalentTreeEditor(self, self.talents, self.def_selected_talents, on_apply=apply, title="Defender Talents")
+        TalentTreeEditor(self, self.talents, self.def_selected_talents, on_apply=apply, title="Defender Talents",
+                         gain_fn=self._gain_fn("defender"))
+
+    def _gain_fn(self, side):
+        """Live preview for the talent editor; settings are captured now (Tk vars are not thread-safe)."""
+        try:
+            att, deff = self._builds()
+            cfg = self._config()
+            ctx = dict(
+                attacker_hero=self.heroes[att.hero_id], defender_hero=self.heroes[deff.hero_id],
+                attacker_build=att, defender_build=deff,
+                artifacts=dict(self.artifacts), pets=dict(self.pets), talent_nodes=dict(self.talents),
+                config=cfg,
+            )
+        except Exception:
+            return None  # e.g. invalid extra bonuses JSON: editor works without preview
+        return lambda selected, nodes: iter_rank_gains(side=side, selected=selected, nodes=nodes, **ctx)
 
     def import_excel(self):
         path = filedialog.askopenfilename(
@@ -154,38 +230,50 @@ class App(tk.Tk):
             return
         try:
             export_v1_json(path, DATA_DIR)
-            self._load_data()
-            messagebox.showinfo("Import complete", "Exported JSON to ./data. Restart the app to refresh dropdown lists.")
+            self.catalog.refresh()
+            self._report_catalog_errors()
+            if self.catalog.errors:
+                raise ValueError("Exported JSON does not load:\n" + "\n".join(f"{k}: {v}" for k, v in self.catalog.errors.items()))
+            messagebox.showinfo("Import complete", "Exported JSON to ./data. Catalog refreshed.")
             self.text.insert("end", f"\nImported from: {path}\nUpdated JSON in: {DATA_DIR}\n")
         except Exception as e:
             messagebox.showerror("Import failed", str(e))
 
+    def _builds(self):
+        att = Build(
+            hero_id=self.att_hero.get(),
+            artifact_id=None if self.att_art.get()=="(none)" else self.att_art.get(),
+            pet_id=None if self.att_pet.get()=="(none)" else self.att_pet.get(),
+            selected_talents=self.att_selected_talents,
+            extra_bonuses=json.loads(self.att_extra.get() or "{}"),
+        )
+        deff = Build(
+            hero_id=self.def_hero.get(),
+            artifact_id=None if self.def_art.get()=="(none)" else self.def_art.get(),
+            pet_id=None if self.def_pet.get()=="(none)" else self.def_pet.get(),
+            selected_talents=self.def_selected_talents,
+            extra_bonuses=json.loads(self.def_extra.get() or "{}"),
+        )
+        return att, deff
+
+    def _config(self):
+        return SimConfig(
+            duration_s=safe_int(self.duration.get(), 60),
+            deterministic=bool(self.det.get()),
+            target_count=max(1, safe_int(self.targets.get(), 1)),
+            aoe_split_ratio=max(0.0, safe_float(self.aoe.get(), 0.5)),
+            counter_enabled=bool(self.counter.get()),
+            rage_on_normal=safe_float(self.rn.get(), 94),
+            rage_on_counter=safe_float(self.rc.get(), 16),
+            defense_constant=safe_float(self.defc.get(), 1400),
+            tick_s=max(0.001, safe_float(self.tick.get(), 1.0)),
+            attack_interval_s=max(0.001, safe_float(self.atk_iv.get(), 1.0)),
+        )
+
     def run_sim(self):
         try:
-            att = Build(
-                hero_id=self.att_hero.get(),
-                artifact_id=None if self.att_art.get()=="(none)" else self.att_art.get(),
-                pet_id=None if self.att_pet.get()=="(none)" else self.att_pet.get(),
-                selected_talents=self.att_selected_talents,
-                extra_bonuses=json.loads(self.att_extra.get() or "{}"),
-            )
-            deff = Build(
-                hero_id=self.def_hero.get(),
-                artifact_id=None if self.def_art.get()=="(none)" else self.def_art.get(),
-                pet_id=None if self.def_pet.get()=="(none)" else self.def_pet.get(),
-                selected_talents=self.def_selected_talents,
-                extra_bonuses=json.loads(self.def_extra.get() or "{}"),
-            )
-            cfg = SimConfig(
-                duration_s=safe_int(self.duration.get(), 60),
-                deterministic=bool(self.det.get()),
-                target_count=max(1, safe_int(self.targets.get(), 1)),
-                aoe_split_ratio=max(0.0, safe_float(self.aoe.get(), 0.5)),
-                counter_enabled=bool(self.counter.get()),
-                rage_on_normal=safe_float(self.rn.get(), 94),
-                rage_on_counter=safe_float(self.rc.get(), 16),
-                defense_constant=safe_float(self.defc.get(), 1400),
-            )
+            att, deff = self._builds()
+            cfg = self._config()
             sim = CombatSimulator(
                 attacker_hero=self.heroes[att.hero_id],
                 defender_hero=self.heroes[deff.hero_id],
@@ -203,4 +291,5 @@ class App(tk.Tk):
             messagebox.showerror("Error", str(e))
 
 if __name__=="__main__":
+    multiprocessing.freeze_support()  # excel export uses a process pool (needed in the frozen exe)
     App().mainloop()